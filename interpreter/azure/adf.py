@@ -1,19 +1,18 @@
 import json
-from typing import Optional,Dict,Any,List,Union,Set
+from typing import Optional,Dict,Any,List,Union,Set,Tuple
 from dataclasses import dataclass
 from interpreter.common.core import ComponentType,CallerComponent,LoaderComponent,TransformerComponent
-from interpreter.common.core import identify_component,parse_loader_component
-from interpreter.common.core import parse_caller_component,parse_transformer_component
-from interpreter.common.graph import Edge,join_to_node,remove_node
+from interpreter.common.core import ComponentCache,default_component_cache
+from interpreter.common.graph import Edge,join_to_node,contract_nodes
 
-@dataclass
+@dataclass(frozen=True,slots=True)
 class Activity:
     name:str
-    parents:List[str]
+    parents:Tuple[str,...]
     user_properties:Dict[str,str]
     outer_activity:Optional[str]
 
-@dataclass
+@dataclass(frozen=True,slots=True)
 class Component:
     name:str
     component_type:ComponentType
@@ -26,72 +25,123 @@ class Pipeline:
     components:List[Component]
 
 
-def get_pipeline_name(pipeline_json:str)->Optional[str]:
+@dataclass(frozen=True,slots=True)
+class PipelineDocument:
+    """
+    Pipeline json which is decoded once
+    json_object : decoded pipeline json
+    """
+    json_object:Dict[str,Any]
 
-    json_object:Dict = None
+    @classmethod
+    def from_json(cls,pipeline_json:Union[str,bytes])->Optional["PipelineDocument"]:
+        """
+        Return None when the pipeline json is not a json object
+        """
 
-    pipeline_name = "/"
-    
-    try:
-        json_object:Dict[str,Any] = json.loads(pipeline_json)
-    except:
-        return None
+        try:
+            json_object = json.loads(pipeline_json)
+        except (ValueError,TypeError):
+            return None
 
-    if "name" not in json_object:
-        return None
-    
-    pipeline_name+=json_object["name"]
+        if not isinstance(json_object,dict):
+            return None
 
-    if "properties" in json_object:
+        return cls(json_object=json_object)
 
-        if "folder" in json_object["properties"] and\
-            "name" in json_object["properties"]["folder"]:
+    def get_name(self)->Optional[str]:
+        return self.json_object.get("name")
 
-            pipeline_name=json_object["properties"]["folder"]["name"]+ pipeline_name
-        
-    
-    return pipeline_name
+    def get_properties(self)->Optional[Dict[str,Any]]:
+        return self.json_object.get("properties")
 
+    def get_folder(self)->Optional[str]:
 
-def get_activities(pipeline_json:str)->Optional[List[Activity]]:
+        properties = self.get_properties()
 
-    json_object:Dict = None
+        if properties is None or "folder" not in properties:
+            return None
 
-    try:
-        json_object:Dict[str,Any] = json.loads(pipeline_json)
-    except:
-        return None
-    
-    if not "properties" in json_object:
-        return None    
-    if not "activities" in json_object["properties"]:
-        return None
-        
-    activities:List[Activity] = list()
+        return properties["folder"].get("name")
 
-    for activity_json in json_object["properties"]["activities"]:
+    def get_activities_json(self)->Optional[List[Dict[str,Any]]]:
 
-        activity = get_activity(activity_json=activity_json,outer_activity=None)
+        properties = self.get_properties()
 
-        if "type" not in activity_json:
+        if properties is None:
             return None
-        
-        activities.append(activity)
 
-        
-        #if for each activity
+        return properties.get("activities")
 
-        if activity_json["type"]=="foreach":
-            activities.extend(get_for_each_nested_activities(activity_json=activity_json,\
-                                                             outer_activity=activity.name))
+    def get_pipeline_name(self)->Optional[str]:
+        """
+        Return folder/name or /name when the pipeline is not in the folder
+        """
 
-        #if conditional activity
+        name = self.get_name()
 
-        elif activity_json["type"]=="condition":
-            activities.extend(get_conditional_nested_activities(activity_json=activity_json,\
-                                                                outer_activity=activity.name))
+        if name is None:
+            return None
 
-    return activities
+        folder = self.get_folder()
+
+        if folder is None:
+            return "/"+name
+
+        return folder+"/"+name
+
+    def get_activities(self)->Optional[List[Activity]]:
+
+        activities_json = self.get_activities_json()
+
+        if activities_json is None:
+            return None
+
+        activities:List[Activity] = list()
+
+        for activity_json in activities_json:
+
+            activity = get_activity(activity_json=activity_json,outer_activity=None)
+
+            if "type" not in activity_json:
+                return None
+
+            activities.append(activity)
+
+
+            #if for each activity
+
+            if activity_json["type"]=="foreach":
+                activities.extend(get_for_each_nested_activities(activity_json=activity_json,\
+                                                                 outer_activity=activity.name))
+
+            #if conditional activity
+
+            elif activity_json["type"]=="condition":
+                activities.extend(get_conditional_nested_activities(activity_json=activity_json,\
+                                                                    outer_activity=activity.name))
+
+        return activities
+
+
+def get_pipeline_name(pipeline_json:str)->Optional[str]:
+
+    document = PipelineDocument.from_json(pipeline_json=pipeline_json)
+
+    if document is None:
+        return None
+
+    return document.get_pipeline_name()
+
+
+def get_activities(pipeline_json:str)->Optional[List[Activity]]:
+
+    document = PipelineDocument.from_json(pipeline_json=pipeline_json)
+
+    if document is None:
+        return None
+
+    return document.get_activities()
 
 def get_for_each_nested_activities(activity_json:Dict[str,Any],\
                           outer_activity:str)->Optional[List[Activity]]:
@@ -146,7 +196,7 @@ def get_activity(activity_json:Dict[str,Any],outer_activity:str=None)->Optional[
     user_properties = get_user_properties(activity_json=activity_json)
 
     return Activity(name=activity_name,\
-                    parents=parent_activities,\
+                    parents=tuple(parent_activities),\
                     user_properties=user_properties,\
                     outer_activity=outer_activity)
 
@@ -173,7 +223,13 @@ def get_user_properties(activity_json:Dict[str,Any])->Dict[str,str]:
     return user_properties
 
     
-def get_components(key:str,activities:List[Activity])->List[Component]:
+def get_components(key:str,activities:List[Activity],cache:Optional[ComponentCache]=None)->List[Component]:
+    """
+    cache : cache of the parsed user properties value , use the default cache when it is None
+    """
+
+    if cache is None:
+        cache = default_component_cache
 
     components:List[Component] = list()
 
@@ -183,21 +239,11 @@ def get_components(key:str,activities:List[Activity])->List[Component]:
             continue
 
         
-        component_type = identify_component(actv.user_properties[key])
+        (component_type,component) = cache.parse_component(actv.user_properties[key])
 
         if component_type is None:
             continue
         
-        component = None
-
-        if component_type==ComponentType.loader:
-            component = parse_loader_component(actv.user_properties[key])
-        elif component_type==ComponentType.caller:
-            component = parse_caller_component(actv.user_properties[key])
-        elif component_type==ComponentType.transformer:
-            component = parse_transformer_component(actv.user_properties[key])
-
-        
         components.append(
             Component(
                 name=actv.name,
@@ -216,19 +262,13 @@ def get_pipeline(pipeline_name:str,activities:List[Activity],components:List[Com
 
     components_name:Set[str] = set([component.name for component in components])
 
-    node_names:List[str] = [x.node_name for x in edges]
-
-    removable_node_name:List[str] = list()
-
     # if the node is not a component we should remove it
-    for x in node_names:
-        if x not in components_name:
-            removable_node_name.append(x)
+
+    removable_node_name:Set[str] = set([x.node_name for x in edges if x.node_name not in components_name])
 
     #remove a non component node
 
-    for x in removable_node_name:
-        edges = remove_node(node_name=x,edges=edges)
+    edges = contract_nodes(node_names=removable_node_name,edges=edges)
 
     return Pipeline(
         name=pipeline_name,\
@@ -251,7 +291,7 @@ def get_edge(activities:List[Activity],has_inner_activity:bool=True)->List[Edge]
         outer_activities_edge.append(
             Edge(
                 node_name=actv.name,
-                parent_nodes=actv.parents
+                parent_nodes=list(actv.parents)
             )
         )
 
@@ -282,11 +322,21 @@ def get_edge(activities:List[Activity],has_inner_activity:bool=True)->List[Edge]
                      edges=outer_activities_edge)
         
     return outer_activities_edge
-        
-
 
+def get_pipeline_from_document(document:PipelineDocument,key:str,\
+                               cache:Optional[ComponentCache]=None)->Optional[Pipeline]:
+    """
+    Build the pipeline from the decoded pipeline json
+    Return None when the pipeline does not have the name or the activities
+    """
 
+    pipeline_name = document.get_pipeline_name()
 
+    activities = document.get_activities()
 
+    if pipeline_name is None or activities is None:
+        return None
 
-    
\ No newline at end of file
+    return get_pipeline(pipeline_name=pipeline_name,\
+                        activities=activities,\
+                        components=get_components(key=key,activities=activities,cache=cache))
@@ -0,0 +1,418 @@
+import os
+import re
+import json
+import mmap
+from typing import Optional,Dict,Any,Iterator,Union,TextIO,Tuple,List
+from interpreter.common.core import ComponentCache
+from interpreter.azure.adf import PipelineDocument,Pipeline,get_pipeline_from_document
+
+# ARM template exported from the data factory or synapse workspace
+# {"parameters":{...},"resources":[{"name":"[concat(parameters('factoryName'), '/pl_name')]",
+#                                   "type":"Microsoft.DataFactory/factories/pipelines","properties":{...}},...]}
+
+RESOURCES_KEY = "resources"
+
+PIPELINE_TYPE_SUFFIX = "/pipelines"
+
+DEFAULT_CHUNK_SIZE = 1024*1024
+
+ARM_LITERAL_PATTERN = re.compile(r"'([^']*)'")
+
+NUMBER_CHARACTERS = "0123456789.eE+-"
+
+BOM = b"\xef\xbb\xbf"
+
+INDEX_FILE_SUFFIX = ".index.json"
+
+# increase when the layout of the index file change
+
+INDEX_VERSION = 1
+
+
+class JSONStream:
+    """
+    Decode the json value one at a time from the text file
+
+    Only the value which is being decoded and the unread part of the chunk are kept in the buffer.
+    When the value is larger than the buffer , the buffer is doubled until the value can be decoded
+
+    byte_offset : byte offset of the start of the file , the file must not translate the newline
+    encoding : encoding of the file which is used to compute the byte offset
+    """
+
+    def __init__(self,file:TextIO,chunk_size:int=DEFAULT_CHUNK_SIZE,\
+                 byte_offset:int=0,encoding:str="utf-8")->None:
+
+        self.file = file
+
+        self.chunk_size = chunk_size
+
+        self.buffer = ""
+
+        self.position = 0
+
+        self.is_eof = False
+
+        self.encoding = encoding
+
+        self._decoder = json.JSONDecoder()
+
+        # byte offset of the character at _counted_position of the buffer
+
+        self._counted_position = 0
+
+        self._counted_byte_offset = byte_offset
+
+    def get_byte_offset(self)->int:
+        """
+        Return the byte offset of the current position in the file
+        """
+
+        self._counted_byte_offset+=len(self.buffer[self._counted_position:self.position].encode(self.encoding))
+
+        self._counted_position = self.position
+
+        return self._counted_byte_offset
+
+    def peek(self)->str:
+        """
+        Return the next character which is not the whitespace , empty string at the end of the file
+        """
+
+        while True:
+
+            while self.position<len(self.buffer) and self.buffer[self.position].isspace():
+                self.position+=1
+
+            if self.position<len(self.buffer) or not self._fill():
+                break
+
+        return self.buffer[self.position:self.position+1]
+
+    def expect(self,character:str)->None:
+
+        if self.peek()!=character:
+            raise ValueError("expected {} at character {} of the buffer".format(character,self.position))
+
+        self.position+=1
+
+    def skip(self,character:str)->bool:
+        """
+        Skip the next character when it is the character
+        """
+
+        if self.peek()!=character:
+            return False
+
+        self.position+=1
+
+        return True
+
+    def decode(self)->Any:
+
+        self.peek()
+
+        while True:
+
+            try:
+                (value,end) = self._decoder.raw_decode(self.buffer,self.position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # the number at the end of the buffer may continue in the next chunk
+
+            if isinstance(value,(int,float)) and not isinstance(value,bool) and\
+                (end==len(self.buffer) or self.buffer[end] in NUMBER_CHARACTERS) and self._fill():
+                continue
+
+            self.position = end
+
+            return value
+
+    def _fill(self)->bool:
+        """
+        Drop the decoded part of the buffer and read the next chunk
+        Return False at the end of the file
+        """
+
+        if self.is_eof:
+            return False
+
+        chunk = self.file.read(max(self.chunk_size,len(self.buffer)-self.position))
+
+        if len(chunk)==0:
+            self.is_eof = True
+            return False
+
+        self.get_byte_offset()
+
+        self.buffer = self.buffer[self.position:]+chunk
+
+        self.position = 0
+
+        self._counted_position = 0
+
+        return True
+
+
+def iter_arm_resources(source:Union[str,os.PathLike,TextIO],\
+                       chunk_size:int=DEFAULT_CHUNK_SIZE)->Iterator[Dict[str,Any]]:
+    """
+    Yield the resources of the ARM template one at a time
+    The other top level value such as parameters are decoded and discarded
+
+    source : path of the ARM template or text file object
+    """
+
+    for (_,_,resource) in iter_arm_resource_ranges(source=source,chunk_size=chunk_size):
+        yield resource
+
+def iter_arm_resource_ranges(source:Union[str,os.PathLike,TextIO],\
+                             chunk_size:int=DEFAULT_CHUNK_SIZE)->Iterator[Tuple[int,int,Dict[str,Any]]]:
+    """
+    Yield (start byte offset,end byte offset,resource) of the resources of the ARM template
+    The byte offset of the text file object is counted from where it is read
+    """
+
+    if isinstance(source,(str,os.PathLike)):
+
+        with open(source,"rb") as file:
+            byte_offset = len(BOM) if file.read(len(BOM))==BOM else 0
+
+        with open(source,encoding="utf-8-sig",newline="") as file:
+            yield from _iter_resource_ranges(stream=JSONStream(file=file,\
+                                                               chunk_size=chunk_size,\
+                                                               byte_offset=byte_offset))
+        return
+
+    yield from _iter_resource_ranges(stream=JSONStream(file=source,chunk_size=chunk_size))
+
+def _iter_resource_ranges(stream:JSONStream)->Iterator[Tuple[int,int,Dict[str,Any]]]:
+
+    stream.expect("{")
+
+    while not stream.skip("}"):
+
+        stream.skip(",")
+
+        key = stream.decode()
+
+        stream.expect(":")
+
+        if key!=RESOURCES_KEY:
+            stream.decode()
+            continue
+
+        stream.expect("[")
+
+        while not stream.skip("]"):
+
+            stream.skip(",")
+
+            stream.peek()
+
+            start = stream.get_byte_offset()
+
+            resource = stream.decode()
+
+            yield (start,stream.get_byte_offset(),resource)
+
+def get_arm_pipeline_name(resource_name:str)->str:
+    """
+    Return the pipeline name of the resource name
+    such as pl_name of [concat(parameters('factoryName'), '/pl_name')] or factory/pl_name
+    """
+
+    literals = ARM_LITERAL_PATTERN.findall(resource_name)
+
+    if len(literals)>0:
+        resource_name = literals[-1]
+
+    return resource_name.split("/")[-1]
+
+def get_arm_pipeline_document(resource:Dict[str,Any])->Optional[PipelineDocument]:
+    """
+    Return None when the resource is not the pipeline
+    """
+
+    if not str(resource.get("type","")).lower().endswith(PIPELINE_TYPE_SUFFIX) or "name" not in resource:
+        return None
+
+    return PipelineDocument(json_object={"name":get_arm_pipeline_name(resource_name=resource["name"]),\
+                                         "properties":resource.get("properties",dict())})
+
+def iter_arm_pipeline_documents(source:Union[str,os.PathLike,TextIO],\
+                                chunk_size:int=DEFAULT_CHUNK_SIZE)->Iterator[PipelineDocument]:
+
+    for resource in iter_arm_resources(source=source,chunk_size=chunk_size):
+
+        document = get_arm_pipeline_document(resource=resource)
+
+        if document is not None:
+            yield document
+
+def iter_arm_pipelines(source:Union[str,os.PathLike,TextIO],key:str,\
+                       cache:Optional[ComponentCache]=None,\
+                       chunk_size:int=DEFAULT_CHUNK_SIZE)->Iterator[Pipeline]:
+    """
+    Yield the pipeline of every pipeline resource in the ARM template
+    Only one pipeline resource is decoded at a time
+    """
+
+    for document in iter_arm_pipeline_documents(source=source,chunk_size=chunk_size):
+
+        pipeline = get_pipeline_from_document(document=document,key=key,cache=cache)
+
+        if pipeline is not None:
+            yield pipeline
+
+
+class ArmIndex:
+    """
+    Byte range of every pipeline resource in the ARM template
+
+    The index is stored next to the ARM template (see get_index_path) with the size and
+    modified time of the ARM template so that the index of the changed ARM template is not used.
+    Only the byte range of the requested pipeline is read and decoded
+
+    ranges : full pipeline name (see get_pipeline_name) -> (start byte offset,end byte offset)
+    """
+
+    def __init__(self,path:Union[str,os.PathLike],ranges:Dict[str,Tuple[int,int]])->None:
+
+        self.path = path
+
+        self.ranges = ranges
+
+    @classmethod
+    def build(cls,path:Union[str,os.PathLike],index_path:Optional[Union[str,os.PathLike]]=None,\
+              chunk_size:int=DEFAULT_CHUNK_SIZE)->"ArmIndex":
+        """
+        Scan the ARM template and store the index
+        """
+
+        ranges:Dict[str,Tuple[int,int]] = dict()
+
+        for (start,end,resource) in iter_arm_resource_ranges(source=path,chunk_size=chunk_size):
+
+            document = get_arm_pipeline_document(resource=resource)
+
+            if document is not None:
+                ranges[document.get_pipeline_name()] = (start,end)
+
+        index = cls(path=path,ranges=ranges)
+
+        index.save(index_path=index_path)
+
+        return index
+
+    @classmethod
+    def load(cls,path:Union[str,os.PathLike],\
+             index_path:Optional[Union[str,os.PathLike]]=None)->Optional["ArmIndex"]:
+        """
+        Return None when the index does not exist or the ARM template has changed
+        """
+
+        if index_path is None:
+            index_path = get_index_path(path=path)
+
+        try:
+            with open(index_path,encoding="utf-8") as file:
+                index_json:Dict[str,Any] = json.load(file)
+        except (OSError,ValueError):
+            return None
+
+        if index_json.get("version")!=INDEX_VERSION or index_json.get("file")!=_get_file_signature(path=path):
+            return None
+
+        return cls(path=path,ranges={x:(y,z) for (x,y,z) in index_json["pipelines"]})
+
+    @classmethod
+    def open(cls,path:Union[str,os.PathLike],index_path:Optional[Union[str,os.PathLike]]=None)->"ArmIndex":
+        """
+        Load the index and build it again when it cannot be used
+        """
+
+        index = cls.load(path=path,index_path=index_path)
+
+        if index is None:
+            index = cls.build(path=path,index_path=index_path)
+
+        return index
+
+    def __len__(self)->int:
+        return len(self.ranges)
+
+    def __contains__(self,pipeline_name:str)->bool:
+        return pipeline_name in self.ranges
+
+    def save(self,index_path:Optional[Union[str,os.PathLike]]=None)->None:
+
+        if index_path is None:
+            index_path = get_index_path(path=self.path)
+
+        index_json = {
+            "version":INDEX_VERSION,
+            "file":_get_file_signature(path=self.path),
+            "pipelines":[[x,y,z] for (x,(y,z)) in self.ranges.items()]
+        }
+
+        with open(index_path,"w",encoding="utf-8") as file:
+            json.dump(index_json,file)
+
+    def get_pipeline_names(self)->List[str]:
+        return list(self.ranges)
+
+    def get_documents(self,pipeline_names:List[str])->Dict[str,PipelineDocument]:
+        """
+        Return full pipeline name -> pipeline document of the pipelines in the index
+        The ARM template is mapped once and only the byte range of the pipelines is decoded
+        """
+
+        documents:Dict[str,PipelineDocument] = dict()
+
+        pipeline_names = [x for x in pipeline_names if x in self.ranges]
+
+        if len(pipeline_names)==0:
+            return documents
+
+        with open(self.path,"rb") as file:
+            with mmap.mmap(file.fileno(),0,access=mmap.ACCESS_READ) as mapped_file:
+
+                for pipeline_name in pipeline_names:
+
+                    (start,end) = self.ranges[pipeline_name]
+
+                    document = get_arm_pipeline_document(resource=json.loads(mapped_file[start:end]))
+
+                    if document is not None:
+                        documents[pipeline_name] = document
+
+        return documents
+
+    def get_document(self,pipeline_name:str)->Optional[PipelineDocument]:
+        return self.get_documents(pipeline_names=[pipeline_name]).get(pipeline_name)
+
+    def get_pipeline(self,pipeline_name:str,key:str,cache:Optional[ComponentCache]=None)->Optional[Pipeline]:
+
+        document = self.get_document(pipeline_name=pipeline_name)
+
+        if document is None:
+            return None
+
+        return get_pipeline_from_document(document=document,key=key,cache=cache)
+
+
+def get_index_path(path:Union[str,os.PathLike])->str:
+    return os.fspath(path)+INDEX_FILE_SUFFIX
+
+def _get_file_signature(path:Union[str,os.PathLike])->List[int]:
+    """
+    Return [size,modified time in nanoseconds] of the file
+    """
+
+    stat = os.stat(path)
+
+    return [stat.st_size,stat.st_mtime_ns]
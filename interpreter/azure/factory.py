@@ -0,0 +1,117 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional,Dict,List,Tuple,Union
+from interpreter.common.core import ComponentCache,default_component_cache
+from interpreter.common.graph import Edge
+from interpreter.azure.adf import PipelineDocument,Pipeline,Component
+from interpreter.azure.adf import get_components,get_pipeline
+
+PIPELINE_FILE_EXTENSION = ".json"
+
+DEFAULT_CHUNK_SIZE = 16
+
+# pipeline sent from the process
+# (full pipeline name,[(node name,[parent node name])],[(component name,user properties value)])
+
+SerializedPipeline = Tuple[str,List[Tuple[str,List[str]]],List[Tuple[str,str]]]
+
+
+def get_pipeline_files(directory:Union[str,os.PathLike])->List[str]:
+    """
+    Return the path of every pipeline json in the directory (such as pipeline folder of the git repo) in sorted order
+    """
+
+    return sorted([os.path.join(directory,x) for x in os.listdir(directory)\
+                   if x.lower().endswith(PIPELINE_FILE_EXTENSION)])
+
+def interpret_pipeline_file(path:str,key:str)->Optional[SerializedPipeline]:
+    """
+    Return the serialized pipeline of the pipeline json file
+    Return None when the file is not the valid pipeline
+    """
+
+    with open(path,"rb") as file:
+        document = PipelineDocument.from_json(pipeline_json=file.read())
+
+    if document is None:
+        return None
+
+    pipeline_name = document.get_pipeline_name()
+
+    activities = document.get_activities()
+
+    if pipeline_name is None or activities is None:
+        return None
+
+    components = get_components(key=key,activities=activities)
+
+    pipeline = get_pipeline(pipeline_name=pipeline_name,activities=activities,components=components)
+
+    component_names = set([x.name for x in components])
+
+    component_values = {x.name:x.user_properties[key] for x in activities if x.name in component_names}
+
+    return dump_pipeline(pipeline=pipeline,component_values=component_values)
+
+def dump_pipeline(pipeline:Pipeline,component_values:Dict[str,str])->SerializedPipeline:
+    """
+    component_values : component name -> user properties value of the component
+    The component is sent as the user properties value which is parsed again by load_pipeline
+    """
+
+    return (pipeline.name,\
+            [(x.node_name,list(x.parent_nodes)) for x in pipeline.edges],\
+            [(x.name,component_values[x.name]) for x in pipeline.components])
+
+def load_pipeline(serialized_pipeline:SerializedPipeline,cache:Optional[ComponentCache]=None)->Pipeline:
+
+    if cache is None:
+        cache = default_component_cache
+
+    (pipeline_name,edges,component_values) = serialized_pipeline
+
+    components:List[Component] = list()
+
+    for (component_name,value) in component_values:
+
+        (component_type,component) = cache.parse_component(value)
+
+        components.append(Component(name=component_name,component_type=component_type,component=component))
+
+    return Pipeline(name=pipeline_name,\
+                    edges=[Edge(node_name=x,parent_nodes=y) for (x,y) in edges],\
+                    components=components)
+
+def interpret_pipeline_directory(directory:Union[str,os.PathLike],key:str,\
+                                 max_workers:Optional[int]=None,\
+                                 chunk_size:int=DEFAULT_CHUNK_SIZE,\
+                                 cache:Optional[ComponentCache]=None)->Dict[str,Pipeline]:
+    """
+    Interpret every pipeline json in the directory in the process pool
+    Return full pipeline name -> pipeline sorted by the full pipeline name
+
+    The invalid pipeline json is skipped.
+    When the pipeline name is in more than one file , the file last in the path order is used
+
+    max_workers : number of process , the files are interpreted in this process when it is 1
+    chunk_size : number of file sent to the process at once
+    cache : cache to parse the component sent from the process
+    """
+
+    paths = get_pipeline_files(directory=directory)
+
+    keys = [key]*len(paths)
+
+    if max_workers==1:
+        results = list(map(interpret_pipeline_file,paths,keys))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(interpret_pipeline_file,paths,keys,chunksize=chunk_size))
+
+    pipelines:Dict[str,Pipeline] = dict()
+
+    for serialized_pipeline in results:
+        if serialized_pipeline is not None:
+            pipelines[serialized_pipeline[0]] = load_pipeline(serialized_pipeline=serialized_pipeline,cache=cache)
+
+    return {x:pipelines[x] for x in sorted(pipelines)}
@@ -0,0 +1,289 @@
+import os
+import sys
+import json
+import queue
+import sqlite3
+import threading
+from dataclasses import asdict
+from typing import Optional,Dict,Any,List,Tuple,Iterable,Iterator,Union,TextIO,TypeVar
+from interpreter.common.core import ComponentCache
+from interpreter.azure.adf import PipelineDocument,Pipeline,Activity,Component
+from interpreter.azure.adf import get_components,get_pipeline
+from interpreter.azure.arm import iter_arm_pipeline_documents
+from interpreter.azure.factory import get_pipeline_files
+
+# read -> decode -> activities -> components -> edges -> sink
+# every stage is the generator which run in its own thread and
+# at most max_size items are waiting between the stages
+
+DEFAULT_QUEUE_SIZE = 64
+
+# seconds to wait for the queue before checking whether the consumer has stopped
+
+QUEUE_TIMEOUT = 0.1
+
+SQLITE_COMMIT_SIZE = 1000
+
+T = TypeVar("T")
+
+
+def bounded(items:Iterable[T],max_size:int=DEFAULT_QUEUE_SIZE)->Iterator[T]:
+    """
+    Iterate the items in the thread and yield them through the queue of max_size items
+    The error of the items is raised in the consumer
+    """
+
+    buffer:queue.Queue = queue.Queue(maxsize=max_size)
+
+    is_stopped = threading.Event()
+
+    def put(value:Tuple[bool,Any])->bool:
+
+        while not is_stopped.is_set():
+            try:
+                buffer.put(value,timeout=QUEUE_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    def produce()->None:
+
+        iterator = iter(items)
+
+        try:
+            for item in iterator:
+                if not put((True,item)):
+                    return
+        except BaseException as error:
+            put((False,error))
+            return
+        finally:
+            # stop the previous stage when the consumer has stopped
+            if hasattr(iterator,"close"):
+                iterator.close()
+
+        put((False,None))
+
+    thread = threading.Thread(target=produce,daemon=True)
+
+    thread.start()
+
+    try:
+        while True:
+
+            (is_item,item) = buffer.get()
+
+            if is_item:
+                yield item
+            elif item is None:
+                return
+            else:
+                raise item
+    finally:
+        is_stopped.set()
+
+def read_pipeline_files(paths:Iterable[str])->Iterator[bytes]:
+
+    for path in paths:
+        with open(path,"rb") as file:
+            yield file.read()
+
+def decode_pipelines(pipeline_jsons:Iterable[Union[str,bytes]])->Iterator[PipelineDocument]:
+    """
+    The invalid pipeline json is skipped
+    """
+
+    for pipeline_json in pipeline_jsons:
+
+        document = PipelineDocument.from_json(pipeline_json=pipeline_json)
+
+        if document is not None:
+            yield document
+
+def get_pipeline_activities(documents:Iterable[PipelineDocument])->Iterator[Tuple[str,List[Activity]]]:
+    """
+    Yield (full pipeline name,activities) , the pipeline without the name or activities is skipped
+    """
+
+    for document in documents:
+
+        pipeline_name = document.get_pipeline_name()
+
+        activities = document.get_activities()
+
+        if pipeline_name is not None and activities is not None:
+            yield (pipeline_name,activities)
+
+def get_pipeline_components(pipeline_activities:Iterable[Tuple[str,List[Activity]]],key:str,\
+                            cache:Optional[ComponentCache]=None)->Iterator[Tuple[str,List[Activity],List[Component]]]:
+
+    for (pipeline_name,activities) in pipeline_activities:
+        yield (pipeline_name,activities,get_components(key=key,activities=activities,cache=cache))
+
+def get_pipelines(pipeline_components:Iterable[Tuple[str,List[Activity],List[Component]]])->Iterator[Pipeline]:
+
+    for (pipeline_name,activities,components) in pipeline_components:
+        yield get_pipeline(pipeline_name=pipeline_name,activities=activities,components=components)
+
+def stream_pipelines(documents:Iterable[PipelineDocument],key:str,\
+                     cache:Optional[ComponentCache]=None,\
+                     max_size:int=DEFAULT_QUEUE_SIZE)->Iterator[Pipeline]:
+    """
+    Yield the pipeline of the documents in the same order through the bounded stages
+
+    cache : the components are parsed in the thread of the stage so the cache must not be used
+            by the other thread at the same time , the new cache of the stream is used when it is None
+    """
+
+    # the default component cache is not locked and can be used by the other stream or thread
+
+    if cache is None:
+        cache = ComponentCache()
+
+    pipeline_activities = bounded(get_pipeline_activities(documents=documents),max_size=max_size)
+
+    pipeline_components = bounded(get_pipeline_components(pipeline_activities=pipeline_activities,\
+                                                          key=key,\
+                                                          cache=cache),max_size=max_size)
+
+    return bounded(get_pipelines(pipeline_components=pipeline_components),max_size=max_size)
+
+def stream_pipeline_directory(directory:Union[str,os.PathLike],key:str,\
+                              cache:Optional[ComponentCache]=None,\
+                              max_size:int=DEFAULT_QUEUE_SIZE)->Iterator[Pipeline]:
+    """
+    Yield the pipeline of every pipeline json in the directory in the path order
+    """
+
+    pipeline_jsons = bounded(read_pipeline_files(paths=get_pipeline_files(directory=directory)),max_size=max_size)
+
+    documents = bounded(decode_pipelines(pipeline_jsons=pipeline_jsons),max_size=max_size)
+
+    return stream_pipelines(documents=documents,key=key,cache=cache,max_size=max_size)
+
+def stream_arm_template(path:Union[str,os.PathLike],key:str,\
+                        cache:Optional[ComponentCache]=None,\
+                        max_size:int=DEFAULT_QUEUE_SIZE)->Iterator[Pipeline]:
+    """
+    Yield the pipeline of every pipeline resource of the ARM template in the file order
+    """
+
+    documents = bounded(iter_arm_pipeline_documents(source=path),max_size=max_size)
+
+    return stream_pipelines(documents=documents,key=key,cache=cache,max_size=max_size)
+
+def pipeline_to_dict(pipeline:Pipeline)->Dict[str,Any]:
+    return asdict(pipeline)
+
+
+class JSONLinesSink:
+    """
+    Write each pipeline as the json in its own line
+    file : the standard output when it is None
+    is_owner : whether the file is closed by the sink , otherwise it is only flushed
+    """
+
+    def __init__(self,file:Optional[TextIO]=None,is_owner:bool=False)->None:
+
+        if file is None:
+            file = sys.stdout
+
+        self.file = file
+
+        self.is_owner = is_owner
+
+    @classmethod
+    def open(cls,path:Union[str,os.PathLike])->"JSONLinesSink":
+        return cls(file=open(path,"w",encoding="utf-8"),is_owner=True)
+
+    def write(self,pipeline:Pipeline)->None:
+
+        self.file.write(json.dumps(pipeline_to_dict(pipeline=pipeline)))
+
+        self.file.write("\n")
+
+    def close(self)->None:
+
+        if self.is_owner:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class SQLiteSink:
+    """
+    Write the pipeline into the pipeline , edge and component tables
+    The root node is stored with null parent_node_name
+    """
+
+    def __init__(self,path:Union[str,os.PathLike],commit_size:int=SQLITE_COMMIT_SIZE)->None:
+
+        self.commit_size = commit_size
+
+        self._connection = sqlite3.connect(path)
+
+        self._pending_count = 0
+
+        self._connection.executescript("""
+        create table if not exists pipeline(pipeline_name text primary key);
+        create table if not exists edge(pipeline_name text,node_name text,parent_node_name text);
+        create table if not exists component(pipeline_name text,component_name text,component_type text,component text);
+        create index if not exists edge_pipeline_name on edge(pipeline_name);
+        create index if not exists component_pipeline_name on component(pipeline_name);
+        """)
+
+    def write(self,pipeline:Pipeline)->None:
+
+        self._connection.execute("delete from edge where pipeline_name=?",(pipeline.name,))
+
+        self._connection.execute("delete from component where pipeline_name=?",(pipeline.name,))
+
+        self._connection.execute("insert or replace into pipeline(pipeline_name) values (?)",(pipeline.name,))
+
+        edges:List[Tuple[str,str,Optional[str]]] = list()
+
+        for edge in pipeline.edges:
+
+            if len(edge.parent_nodes)==0:
+                edges.append((pipeline.name,edge.node_name,None))
+
+            for parent_node in edge.parent_nodes:
+                edges.append((pipeline.name,edge.node_name,parent_node))
+
+        self._connection.executemany("insert into edge values (?,?,?)",edges)
+
+        self._connection.executemany("insert into component values (?,?,?,?)",\
+                                     [(pipeline.name,x.name,str(x.component_type),json.dumps(asdict(x)["component"]))\
+                                      for x in pipeline.components])
+
+        self._pending_count+=1
+
+        if self._pending_count>=self.commit_size:
+            self._connection.commit()
+            self._pending_count = 0
+
+    def close(self)->None:
+
+        self._connection.commit()
+
+        self._connection.close()
+
+
+def write_pipelines(pipelines:Iterable[Pipeline],sink:Union[JSONLinesSink,SQLiteSink])->int:
+    """
+    Write the pipelines into the sink and close it
+    Return the number of pipeline written
+    """
+
+    count = 0
+
+    try:
+        for pipeline in pipelines:
+            sink.write(pipeline=pipeline)
+            count+=1
+    finally:
+        sink.close()
+
+    return count
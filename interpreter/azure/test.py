@@ -1,5 +1,16 @@
 from interpreter.azure.adf import get_pipeline_name,get_activities,get_edge,get_components,get_pipeline
+from interpreter.azure.adf import PipelineDocument
+from interpreter.azure.arm import iter_arm_pipelines,iter_arm_resources,ArmIndex,get_index_path
+from interpreter.azure.factory import interpret_pipeline_directory
+from interpreter.azure.stream import stream_pipeline_directory,stream_arm_template,write_pipelines
+from interpreter.azure.stream import bounded,JSONLinesSink,SQLiteSink
+import sqlite3
+import io
+import os
+import tempfile
+import json
 from interpreter.common.graph import edge_to_dict
+from interpreter.common.core import default_component_cache
 
 def test_value_single_get_pipeline_name():
     pipeline_json = """
@@ -279,6 +290,302 @@ def test_value_get_pipeline():
 
     
 
+def test_value_pipeline_document():
+
+    pipeline_json = """
+    {
+        "name": "pl_testing",
+        "properties": {
+            "folder": {
+                "name": "foo"
+            },
+            "activities": [
+                {
+                    "name": "actv_testing",
+                    "type": "Copy",
+                    "dependsOn": [
+                        {
+                            "activity": "parent_actv1"
+                        }
+                    ]
+                },
+                {
+                    "name": "parent_actv1",
+                    "type": "Copy"
+                }
+            ]
+        }
+    }
+    """
+
+    document = PipelineDocument.from_json(pipeline_json=pipeline_json)
+
+    assert document.get_name()=="pl_testing"
+    assert document.get_folder()=="foo"
+    assert document.get_pipeline_name()==get_pipeline_name(pipeline_json=pipeline_json)
+    assert len(document.get_activities_json())==2
+    assert [x.name for x in document.get_activities()]==["actv_testing","parent_actv1"]
+    assert document.get_activities()[0].parents==("parent_actv1",)
+    assert PipelineDocument.from_json(pipeline_json="[1]") is None
+    assert PipelineDocument.from_json(pipeline_json="{") is None
+
+def test_value_iter_arm_pipelines():
+
+    arm_json = """
+    {
+        "$schema": "http://schema.management.azure.com/schemas/2015-01-01/deploymentTemplate.json#",
+        "parameters": {
+            "factoryName": {
+                "type": "string"
+            }
+        },
+        "resources": [
+            {
+                "name": "[concat(parameters('factoryName'), '/pl_load')]",
+                "type": "Microsoft.DataFactory/factories/pipelines",
+                "properties": {
+                    "activities": [
+                        {
+                            "name": "actv_load",
+                            "type": "Copy",
+                            "userProperties": [
+                                {
+                                    "name": "data-inc",
+                                    "value": "load:source:db:cloud:foo.hello[testing.apple]|target:db:cloud:foo.hello[testing.ball]"
+                                }
+                            ]
+                        }
+                    ],
+                    "folder": {
+                        "name": "foo"
+                    }
+                }
+            },
+            {
+                "name": "[concat(parameters('factoryName'), '/ls_sql')]",
+                "type": "Microsoft.DataFactory/factories/linkedServices",
+                "properties": {
+                    "timeout": 1.5e3
+                }
+            },
+            {
+                "name": "[concat(parameters('factoryName'), '/pl_empty')]",
+                "type": "Microsoft.DataFactory/factories/pipelines",
+                "properties": {
+                    "activities": []
+                }
+            }
+        ]
+    }
+    """
+
+    assert len(list(iter_arm_resources(io.StringIO(arm_json),chunk_size=7)))==3
+
+    pipelines = list(iter_arm_pipelines(io.StringIO(arm_json),key="data-inc",chunk_size=7))
+
+    assert [x.name for x in pipelines]==["foo/pl_load","/pl_empty"]
+    assert [x.name for x in pipelines[0].components]==["actv_load"]
+    assert len(pipelines[1].edges)==0
+
+def test_value_arm_index():
+
+    arm_json = """
+    {
+        "resources": [
+            {
+                "name": "[concat(parameters('factoryName'), '/pl_load')]",
+                "type": "Microsoft.DataFactory/factories/pipelines",
+                "properties": {
+                    "description": "ロード",
+                    "activities": [
+                        {
+                            "name": "actv_load",
+                            "type": "Copy",
+                            "userProperties": [
+                                {
+                                    "name": "data-inc",
+                                    "value": "load:source:db:cloud:foo.hello[testing.apple]|target:db:cloud:foo.hello[testing.ball]"
+                                }
+                            ]
+                        }
+                    ],
+                    "folder": {
+                        "name": "foo"
+                    }
+                }
+            },
+            {
+                "name": "[concat(parameters('factoryName'), '/pl_empty')]",
+                "type": "Microsoft.DataFactory/factories/pipelines",
+                "properties": {
+                    "activities": []
+                }
+            }
+        ]
+    }
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        path = os.path.join(directory,"arm_template.json")
+
+        with open(path,"w",encoding="utf-8") as file:
+            file.write(arm_json)
+
+        assert ArmIndex.load(path=path) is None
+
+        ArmIndex.build(path=path,chunk_size=16)
+
+        assert os.path.exists(get_index_path(path=path))
+
+        index = ArmIndex.open(path=path)
+
+        assert index.get_pipeline_names()==["foo/pl_load","/pl_empty"]
+        assert index.get_document(pipeline_name="/pl_empty").get_name()=="pl_empty"
+        assert index.get_document(pipeline_name="/pl_missing") is None
+
+        pipeline = index.get_pipeline(pipeline_name="foo/pl_load",key="data-inc")
+
+        assert pipeline.name=="foo/pl_load"
+        assert [x.name for x in pipeline.components]==["actv_load"]
+
+        # the index of the changed ARM template is not used
+
+        with open(path,"a",encoding="utf-8") as file:
+            file.write(" ")
+
+        assert ArmIndex.load(path=path) is None
+
+def test_value_interpret_pipeline_directory():
+
+    load_value = "load:source:db:cloud:foo.hello[testing.apple]|target:db:cloud:foo.hello[testing.ball]"
+
+    pipeline_jsons = {
+        "pl_b.json":{
+            "name":"pl_b",
+            "properties":{
+                "activities":[
+                    {"name":"actv_load","type":"Copy","userProperties":[{"name":"data-inc","value":load_value}]},
+                    {"name":"actv_wait","type":"Wait","dependsOn":[{"activity":"actv_load"}]},
+                    {"name":"actv_call","type":"ExecutePipeline","dependsOn":[{"activity":"actv_wait"}],\
+                     "userProperties":[{"name":"data-inc","value":"call:pipeline|foo/pl_a"}]}
+                ]
+            }
+        },
+        "pl_a.json":{
+            "name":"pl_a",
+            "properties":{
+                "folder":{"name":"foo"},
+                "activities":[
+                    {"name":"actv_load","type":"Copy","userProperties":[{"name":"data-inc","value":load_value}]}
+                ]
+            }
+        }
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        for file_name in pipeline_jsons:
+            with open(os.path.join(directory,file_name),"w") as file:
+                json.dump(pipeline_jsons[file_name],file)
+
+        with open(os.path.join(directory,"invalid.json"),"w") as file:
+            file.write("{")
+
+        for max_workers in [1,2]:
+
+            pipelines = interpret_pipeline_directory(directory=directory,key="data-inc",max_workers=max_workers)
+
+            assert list(pipelines)==["/pl_b","foo/pl_a"]
+            assert edge_to_dict(edges=pipelines["/pl_b"].edges)=={"actv_load":[],"actv_call":["actv_load"]}
+            assert [x.name for x in pipelines["/pl_b"].components]==["actv_load","actv_call"]
+            assert pipelines["foo/pl_a"].components[0].component.target.tables==("testing.ball",)
+
+def test_value_stream_pipeline_directory():
+
+    load_value = "load:source:db:cloud:foo.hello[testing.apple]|target:db:cloud:foo.hello[testing.ball]"
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        for index in range(20):
+            with open(os.path.join(directory,"pl_{:02}.json".format(index)),"w") as file:
+                json.dump({"name":"pl_{:02}".format(index),\
+                           "properties":{"activities":[
+                               {"name":"actv_load","type":"Copy","userProperties":[{"name":"data-inc","value":load_value}]},
+                               {"name":"actv_next","type":"Copy","dependsOn":[{"activity":"actv_load"}],\
+                                "userProperties":[{"name":"data-inc","value":load_value}]}
+                            ]}},file)
+
+        with open(os.path.join(directory,"invalid.json"),"w") as file:
+            file.write("{")
+
+        pipelines = list(stream_pipeline_directory(directory=directory,key="data-inc",max_size=2))
+
+        assert [x.name for x in pipelines]==["/pl_{:02}".format(x) for x in range(20)]
+        assert edge_to_dict(edges=pipelines[0].edges)=={"actv_load":[],"actv_next":["actv_load"]}
+
+        output = io.StringIO()
+
+        assert write_pipelines(stream_pipeline_directory(directory=directory,key="data-inc"),JSONLinesSink(file=output))==20
+        assert json.loads(output.getvalue().splitlines()[0])["components"][1]["component"]["target"]["tables"]==["testing.ball"]
+
+        database_path = os.path.join(directory,"lineage.db")
+
+        write_pipelines(stream_pipeline_directory(directory=directory,key="data-inc"),SQLiteSink(path=database_path))
+
+        with sqlite3.connect(database_path) as connection:
+            assert connection.execute("select count(*) from pipeline").fetchone()[0]==20
+            assert connection.execute("select node_name,parent_node_name from edge where pipeline_name='/pl_00'").fetchall()==\
+                [("actv_load",None),("actv_next","actv_load")]
+
+def test_value_stream_arm_template():
+
+    load_value = "load:source:db:cloud:foo.hello[testing.apple]|target:db:cloud:foo.hello[testing.ball]"
+
+    resources = [{"name":"[concat(parameters('factoryName'), '/pl_{:02}')]".format(index),\
+                  "type":"Microsoft.DataFactory/factories/pipelines",\
+                  "properties":{"activities":[
+                      {"name":"actv_load","type":"Copy","userProperties":[{"name":"data-inc","value":load_value}]}
+                  ]}} for index in range(10)]
+
+    resources.insert(3,{"name":"[concat(parameters('factoryName'), '/ls_db')]",\
+                        "type":"Microsoft.DataFactory/factories/linkedServices",\
+                        "properties":{}})
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        path = os.path.join(directory,"arm_template.json")
+
+        with open(path,"w",encoding="utf-8") as file:
+            json.dump({"parameters":{"factoryName":{"type":"string"}},"resources":resources},file)
+
+        default_cache_count = default_component_cache.hits+default_component_cache.misses
+
+        pipelines = list(stream_arm_template(path=path,key="data-inc",max_size=2))
+
+        # the stream use its own cache instead of the default cache which is not thread safe
+
+        assert default_component_cache.hits+default_component_cache.misses==default_cache_count
+
+        assert [x.name for x in pipelines]==["/pl_{:02}".format(x) for x in range(10)]
+        assert pipelines[0].components[0].component.target.tables==("testing.ball",)
+
+def test_error_bounded():
+
+    def fail():
+        yield 1
+        raise ValueError("fail")
+
+    items = bounded(fail(),max_size=1)
+
+    assert next(items)==1
+
+    try:
+        next(items)
+        assert False
+    except ValueError:
+        pass
+
 def main():
     test_value_single_get_pipeline_name()
     test_value_folder_get_pipeline_name()
@@ -286,6 +593,13 @@ def main():
     test_value_get_edge()
     test_value_get_components()
     test_value_get_pipeline()
+    test_value_pipeline_document()
+    test_value_iter_arm_pipelines()
+    test_value_arm_index()
+    test_value_interpret_pipeline_directory()
+    test_value_stream_pipeline_directory()
+    test_value_stream_arm_template()
+    test_error_bounded()
 
 
 if __name__=="__main__":
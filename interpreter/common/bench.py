@@ -0,0 +1,221 @@
+import gc
+import time
+import tracemalloc
+from typing import List,Tuple,Optional,Callable,Any
+from dataclasses import dataclass
+from core import DBComponentValue,LoaderComponent,ComponentValueType,LocationType
+from core import UNDEFINED_COMPONENT_VALUE
+from graph import Edge
+from vih import VIH,vihs_to_edges,get_vih,parse_source,parse_target,remove_empty
+
+# benchmark of the interpreter , run with python bench.py
+
+# layout of the component before it was slotted and frozen
+
+@dataclass
+class PlainDBComponentValue:
+    location:LocationType
+    tag:str
+    tables:List[str]
+
+@dataclass
+class PlainUndefinedComponentValue:
+    pass
+
+@dataclass
+class PlainLoaderComponent:
+    source:Any
+    target:Any
+    source_component_value_type:ComponentValueType
+    target_component_value_type:ComponentValueType
+
+@dataclass
+class PlainEdge:
+    node_name:str
+    parent_nodes:List[str]
+
+
+def measure_memory(create:Callable[[],Any])->Tuple[int,Any]:
+    """
+    Return (allocated bytes,created object)
+    """
+
+    tracemalloc.start()
+
+    created = create()
+
+    (allocated,_) = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+
+    return (allocated,created)
+
+def create_plain_factory(activity_count:int)->List[Any]:
+
+    objects:List[Any] = list()
+
+    for index in range(activity_count):
+
+        objects.append(
+            PlainLoaderComponent(
+                source=PlainUndefinedComponentValue(),
+                target=PlainDBComponentValue(location=LocationType.prime,\
+                                             tag="host.db",\
+                                             tables=["s.table_"+str(index%500)]),
+                source_component_value_type=ComponentValueType.undefined,
+                target_component_value_type=ComponentValueType.database
+            )
+        )
+
+        objects.append(PlainEdge(node_name="actv_"+str(index),parent_nodes=["actv_"+str(index-1)]))
+
+    return objects
+
+def create_slotted_factory(activity_count:int)->List[Any]:
+
+    objects:List[Any] = list()
+
+    for index in range(activity_count):
+
+        objects.append(
+            LoaderComponent(
+                source=UNDEFINED_COMPONENT_VALUE,
+                target=DBComponentValue(location=LocationType.prime,\
+                                        tag="host.db",\
+                                        tables=("s.table_"+str(index%500),)),
+                source_component_value_type=ComponentValueType.undefined,
+                target_component_value_type=ComponentValueType.database
+            )
+        )
+
+        objects.append(Edge(node_name="actv_"+str(index),parent_nodes=["actv_"+str(index-1)]))
+
+    return objects
+
+def bench_component_memory(activity_count:int=100000)->Tuple[float,float]:
+    """
+    Return the bytes per activity of (plain,slotted) components and edges
+    """
+
+    (plain_size,_) = measure_memory(lambda:create_plain_factory(activity_count=activity_count))
+
+    (slotted_size,_) = measure_memory(lambda:create_slotted_factory(activity_count=activity_count))
+
+    return (plain_size/activity_count,slotted_size/activity_count)
+
+def measure_time(run:Callable[[],Any],repeat:int=3)->float:
+    """
+    Return the fastest seconds of the run
+    The garbage collector is disabled while the run is timed as timeit does
+    """
+
+    timings:List[float] = list()
+
+    is_gc_enabled = gc.isenabled()
+
+    gc.disable()
+
+    try:
+        for _ in range(repeat):
+
+            start = time.perf_counter()
+
+            run()
+
+            timings.append(time.perf_counter()-start)
+    finally:
+        if is_gc_enabled:
+            gc.enable()
+
+    return min(timings)
+
+def create_vihs(statement_count:int,staging_table_count:int=50)->List[VIH]:
+    """
+    Procedure which load the staging tables from the source tables
+    and then read the shared staging tables into the final tables
+    """
+
+    vihs:List[VIH] = list()
+
+    for index in range(statement_count):
+
+        staging_table = "stg.table_"+str(index%staging_table_count)
+
+        if index%2==0:
+            vihs.append(VIH(order=index,source=("src.table_"+str(index),"src.lookup"),target=(staging_table,)))
+        else:
+            vihs.append(VIH(order=index,source=(staging_table,"stg.calendar"),target=("dbo.table_"+str(index),)))
+
+    return vihs
+
+def bench_vihs_to_edges(statement_counts:List[int]=[1000,2000,4000,8000,16000])->List[Tuple[int,float]]:
+    """
+    Return (number of statement,microseconds per statement) of vihs_to_edges
+    """
+
+    timings:List[Tuple[int,float]] = list()
+
+    for statement_count in statement_counts:
+
+        vihs = create_vihs(statement_count=statement_count)
+
+        seconds = measure_time(lambda:vihs_to_edges(vihs=vihs))
+
+        timings.append((statement_count,seconds*1000000/statement_count))
+
+    return timings
+
+def get_vih_with_index(vih_statement:str)->Optional[List[VIH]]:
+    """
+    get_vih before the scanner which find the block with str.index
+    """
+
+    vih:List[VIH] = list()
+
+    order = 1
+
+    for statement in vih_statement.split(";"):
+        if len(statement.replace(" ",""))>1:
+            try:
+                source = parse_source(statement=statement)
+                target = parse_target(statement=statement)
+            except ValueError:
+                return None
+
+            vih.append(VIH(order=order,source=tuple(remove_empty(source)),target=tuple(remove_empty(target))))
+
+            order+=1
+
+    return vih
+
+def bench_get_vih(statement_count:int=20000)->Tuple[float,float]:
+    """
+    Return the microseconds per statement of (str.index,scanner) get_vih
+    """
+
+    vih_statement = "".join(["source:src.table_{0},src.lookup|target:stg.table_{0}|;".format(x)\
+                             for x in range(statement_count)])
+
+    index_seconds = measure_time(lambda:get_vih_with_index(vih_statement=vih_statement))
+
+    scanner_seconds = measure_time(lambda:get_vih(vih_statement=vih_statement))
+
+    return (index_seconds*1000000/statement_count,scanner_seconds*1000000/statement_count)
+
+
+def main():
+
+    (plain_size,slotted_size) = bench_component_memory()
+
+    print("component memory per activity : plain {:.0f} bytes , slotted {:.0f} bytes ({:.0%} less)"\
+          .format(plain_size,slotted_size,1-slotted_size/plain_size))
+
+    for (statement_count,microseconds) in bench_vihs_to_edges():
+        print("vihs_to_edges : {} statements , {:.2f} us per statement".format(statement_count,microseconds))
+
+    (index_microseconds,scanner_microseconds) = bench_get_vih()
+
+    print("get_vih per statement : str.index {:.2f} us , scanner {:.2f} us".format(index_microseconds,scanner_microseconds))
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import json
+import sqlite3
+import hashlib
+from typing import List,Optional,Tuple,Iterable,Union
+from dataclasses import dataclass
+from vih import VIH,PARSER_VERSION
+
+# content_hash : sha256 of the file
+# procedure_name : schema.procedure of the create procedure statement , null when there is no statement
+# vihs : json of [[order,[source],[target]]] , null when the vih is invalid
+
+CREATE_TABLE_STATEMENT = """
+create table if not exists vih
+(
+    content_hash text primary key,
+    parser_version integer not null,
+    procedure_name text,
+    vihs text
+)
+"""
+
+@dataclass(frozen=True,slots=True)
+class CachedVIH:
+    """
+    procedure_name : None when the file does not have the create procedure statement
+    vihs : None when the vih is invalid
+    """
+    procedure_name:Optional[str]
+    vihs:Optional[List[VIH]]
+
+
+def get_content_hash(data:bytes)->str:
+    return hashlib.sha256(data).hexdigest()
+
+def dump_vihs(vihs:Optional[List[VIH]])->Optional[str]:
+
+    if vihs is None:
+        return None
+
+    return json.dumps([[x.order,list(x.source),list(x.target)] for x in vihs])
+
+def load_vihs(value:Optional[str])->Optional[List[VIH]]:
+
+    if value is None:
+        return None
+
+    return [VIH(order=order,source=tuple(source),target=tuple(target))\
+            for (order,source,target) in json.loads(value)]
+
+
+class VIHCache:
+    """
+    SQLite store of the parsed vih keyed by the content hash of the file
+
+    The vih parsed by the other parser version is treated as missing
+    and is replaced when the vih is put again
+
+    path : path of the database file , ":memory:" for the database which is not persisted
+    """
+
+    def __init__(self,path:Union[str,os.PathLike]=":memory:",parser_version:int=PARSER_VERSION)->None:
+
+        self.path = path
+
+        self.parser_version = parser_version
+
+        self.hits = 0
+
+        self.misses = 0
+
+        self._connection = sqlite3.connect(path)
+
+        with self._connection:
+            self._connection.execute(CREATE_TABLE_STATEMENT)
+
+    def __len__(self)->int:
+        return self._connection.execute("select count(*) from vih where parser_version=?",\
+                                        (self.parser_version,)).fetchone()[0]
+
+    def __enter__(self)->"VIHCache":
+        return self
+
+    def __exit__(self,*args)->None:
+        self.close()
+
+    def close(self)->None:
+        self._connection.close()
+
+    def get(self,content_hash:str)->Optional[CachedVIH]:
+        """
+        Return None when the vih is not cached
+        """
+
+        row = self._connection.execute("select procedure_name,vihs from vih where content_hash=? and parser_version=?",\
+                                       (content_hash,self.parser_version)).fetchone()
+
+        if row is None:
+            self.misses+=1
+            return None
+
+        self.hits+=1
+
+        return CachedVIH(procedure_name=row[0],vihs=load_vihs(value=row[1]))
+
+    def put(self,content_hash:str,cached_vih:CachedVIH)->None:
+        self.put_many(items=[(content_hash,cached_vih)])
+
+    def put_many(self,items:Iterable[Tuple[str,CachedVIH]])->None:
+        """
+        Store all the (content hash,cached vih) in one transaction
+        """
+
+        with self._connection:
+            self._connection.executemany("insert or replace into vih(content_hash,parser_version,procedure_name,vihs) values (?,?,?,?)",\
+                                         [(x,self.parser_version,y.procedure_name,dump_vihs(vihs=y.vihs)) for (x,y) in items])
@@ -0,0 +1,194 @@
+from bisect import bisect_left
+from typing import List,Dict,Optional,Tuple,Union
+from dataclasses import dataclass
+from core import LocationType,DBComponentValue,LoaderComponent,TransformerComponent
+from vih import VIH
+
+WILDCARD = "*"
+
+# (full pipeline name,component name) of the component which use the table
+# the component name is only unique in its pipeline
+
+ComponentKey = Tuple[str,str]
+
+@dataclass(frozen=True,slots=True)
+class TableReference:
+    """
+    name : full table name which is tag.schema.table
+    """
+    table_id:int
+    location:LocationType
+    name:str
+
+
+class TableCatalog:
+    """
+    Catalog of every table used by the components
+
+    The tag and table are concat into the full table name which is interned into the table id.
+    SQL Server style name are case insensitive so the name is lower case
+    and the square bracket is removed unless case_sensitive is True
+    """
+
+    def __init__(self,case_sensitive:bool=False)->None:
+
+        self.case_sensitive = case_sensitive
+
+        self.tables:List[TableReference] = list()
+
+        self._table_ids:Dict[Tuple[LocationType,str],int] = dict()
+
+        # full table name -> table ids of every location
+
+        self._name_ids:Dict[str,List[int]] = dict()
+
+        # table id -> ordered set of component key
+
+        self._readers:Dict[int,Dict[ComponentKey,None]] = dict()
+
+        self._writers:Dict[int,Dict[ComponentKey,None]] = dict()
+
+        # sorted full table name for the prefix lookup , None when it need to be sorted again
+
+        self._sorted_names:Optional[List[str]] = None
+
+    def __len__(self)->int:
+        return len(self.tables)
+
+    def normalize_name(self,name:str)->str:
+
+        if self.case_sensitive:
+            return name
+
+        return name.replace("[","").replace("]","").lower()
+
+    def intern_table(self,location:LocationType,tag:str,table:str)->int:
+        """
+        Return the table id of the table
+        """
+
+        name = self.normalize_name(name=tag+"."+table)
+
+        key = (location,name)
+
+        if key in self._table_ids:
+            return self._table_ids[key]
+
+        table_id = len(self.tables)
+
+        self._table_ids[key] = table_id
+
+        self.tables.append(TableReference(table_id=table_id,location=location,name=name))
+
+        if name not in self._name_ids:
+            self._name_ids[name] = list()
+            self._sorted_names = None
+
+        self._name_ids[name].append(table_id)
+
+        return table_id
+
+    def add_component(self,pipeline_name:str,component_name:str,component:Union[LoaderComponent,TransformerComponent],\
+                      vihs:Optional[List[VIH]]=None)->None:
+        """
+        Index the table read and written by the component
+        pipeline_name : full pipeline name of the component such as foo/pl_name
+        vihs : vih of the transformer procedure , the table in the vih are in the database of the transformer
+        """
+
+        component_key = (pipeline_name,component_name)
+
+        if isinstance(component,LoaderComponent):
+
+            self._add_tables(component_key=component_key,\
+                             component_value=component.source,\
+                             users=self._readers)
+
+            self._add_tables(component_key=component_key,\
+                             component_value=component.target,\
+                             users=self._writers)
+
+        elif isinstance(component,TransformerComponent) and\
+            isinstance(component.source,DBComponentValue) and vihs is not None:
+
+            for vih in vihs:
+
+                for table in vih.source:
+                    self._add_user(table_id=self.intern_table(location=component.source.location,\
+                                                              tag=component.source.tag,\
+                                                              table=table),\
+                                   component_key=component_key,\
+                                   users=self._readers)
+
+                for table in vih.target:
+                    self._add_user(table_id=self.intern_table(location=component.source.location,\
+                                                              tag=component.source.tag,\
+                                                              table=table),\
+                                   component_key=component_key,\
+                                   users=self._writers)
+
+    def find_tables(self,pattern:str)->List[TableReference]:
+        """
+        pattern : full table name or the prefix which end with * such as host.db.sales.*
+        """
+
+        if not pattern.endswith(WILDCARD):
+            return [self.tables[x] for x in self._name_ids.get(self.normalize_name(name=pattern),())]
+
+        prefix = self.normalize_name(name=pattern[:-len(WILDCARD)])
+
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self._name_ids)
+
+        tables:List[TableReference] = list()
+
+        for index in range(bisect_left(self._sorted_names,prefix),len(self._sorted_names)):
+
+            name = self._sorted_names[index]
+
+            if not name.startswith(prefix):
+                break
+
+            tables.extend([self.tables[x] for x in self._name_ids[name]])
+
+        return tables
+
+    def get_readers(self,pattern:str)->List[ComponentKey]:
+        """
+        Return (full pipeline name,component name) of the component which read the tables
+        """
+        return self._get_users(pattern=pattern,users=self._readers)
+
+    def get_writers(self,pattern:str)->List[ComponentKey]:
+        """
+        Return (full pipeline name,component name) of the component which write the tables
+        """
+        return self._get_users(pattern=pattern,users=self._writers)
+
+    def _get_users(self,pattern:str,users:Dict[int,Dict[ComponentKey,None]])->List[ComponentKey]:
+
+        component_keys:Dict[ComponentKey,None] = dict()
+
+        for table in self.find_tables(pattern=pattern):
+            component_keys.update(users.get(table.table_id,()))
+
+        return list(component_keys)
+
+    def _add_tables(self,component_key:ComponentKey,component_value:object,users:Dict[int,Dict[ComponentKey,None]])->None:
+
+        if not isinstance(component_value,DBComponentValue):
+            return
+
+        for table in component_value.tables:
+            self._add_user(table_id=self.intern_table(location=component_value.location,\
+                                                      tag=component_value.tag,\
+                                                      table=table),\
+                           component_key=component_key,\
+                           users=users)
+
+    def _add_user(self,table_id:int,component_key:ComponentKey,users:Dict[int,Dict[ComponentKey,None]])->None:
+
+        if table_id not in users:
+            users[table_id] = dict()
+
+        users[table_id][component_key] = None
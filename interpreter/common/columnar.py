@@ -0,0 +1,186 @@
+from array import array
+from enum import Enum
+from typing import Iterable,List,Dict,Tuple,Optional,Union
+from core import ComponentType,ComponentValueType,LocationType
+from core import DBComponentValue,UndefinedComponentValue,BlobComponentValue
+from core import LoaderComponent,TransformerComponent,parse_component
+
+# code stored in the columns is the index of the enum , NULL_CODE when there is no value
+
+NULL_CODE = -1
+
+COMPONENT_TYPE_CODES:Dict[ComponentType,int] = {x:index for index,x in enumerate(ComponentType)}
+
+COMPONENT_VALUE_TYPE_CODES:Dict[ComponentValueType,int] = {x:index for index,x in enumerate(ComponentValueType)}
+
+LOCATION_TYPE_CODES:Dict[LocationType,int] = {x:index for index,x in enumerate(LocationType)}
+
+class ErrorCode(int,Enum):
+    none=0
+    not_component=1
+    invalid_component=2
+
+
+class ComponentColumns:
+    """
+    Parsed components stored as parallel arrays , row i is the i th value
+
+    The tag and table are interned , tag_ids and table_ids are the index in tags and tables.
+    The tables of the row i are table_ids[table_offsets[i]:table_offsets[i+1]]
+    Transformer only have the source and caller have neither source nor target
+    """
+
+    def __init__(self)->None:
+
+        self.tags:List[str] = list()
+
+        self.tables:List[str] = list()
+
+        self.error_codes = array("b")
+
+        self.component_types = array("b")
+
+        self.source_types = array("b")
+
+        self.source_locations = array("b")
+
+        self.source_tag_ids = array("i")
+
+        self.source_table_offsets = array("i",[0])
+
+        self.source_table_ids = array("i")
+
+        self.target_types = array("b")
+
+        self.target_locations = array("b")
+
+        self.target_tag_ids = array("i")
+
+        self.target_table_offsets = array("i",[0])
+
+        self.target_table_ids = array("i")
+
+        self._tag_ids:Dict[str,int] = dict()
+
+        self._table_ids:Dict[str,int] = dict()
+
+    def __len__(self)->int:
+        return len(self.error_codes)
+
+    def get_source_tables(self,row:int)->List[str]:
+        return [self.tables[x] for x in self.source_table_ids[self.source_table_offsets[row]:self.source_table_offsets[row+1]]]
+
+    def get_target_tables(self,row:int)->List[str]:
+        return [self.tables[x] for x in self.target_table_ids[self.target_table_offsets[row]:self.target_table_offsets[row+1]]]
+
+    def count_tags(self,component_type:ComponentType,location:LocationType,is_target:bool=True)->Dict[str,int]:
+        """
+        Return tag -> number of component which read (or write when is_target) the database of the location
+        """
+
+        component_type_code = COMPONENT_TYPE_CODES[component_type]
+
+        location_code = LOCATION_TYPE_CODES[location]
+
+        locations = self.target_locations if is_target else self.source_locations
+
+        tag_ids = self.target_tag_ids if is_target else self.source_tag_ids
+
+        counts:Dict[str,int] = dict()
+
+        for row in range(len(self)):
+            if self.component_types[row]==component_type_code and locations[row]==location_code:
+
+                tag = self.tags[tag_ids[row]]
+
+                counts[tag] = counts.get(tag,0)+1
+
+        return counts
+
+    def append(self,component_type:Optional[ComponentType],\
+               component:Optional[Union[LoaderComponent,TransformerComponent]])->None:
+
+        if component_type is None:
+            self.error_codes.append(ErrorCode.not_component)
+        elif component is None:
+            self.error_codes.append(ErrorCode.invalid_component)
+        else:
+            self.error_codes.append(ErrorCode.none)
+
+        self.component_types.append(NULL_CODE if component_type is None else COMPONENT_TYPE_CODES[component_type])
+
+        (source_type,source,target_type,target) = (None,None,None,None)
+
+        if isinstance(component,LoaderComponent):
+            (source_type,source) = (component.source_component_value_type,component.source)
+            (target_type,target) = (component.target_component_value_type,component.target)
+        elif isinstance(component,TransformerComponent):
+            (source_type,source) = (component.component_value_type,component.source)
+
+        self._append_value(component_value_type=source_type,\
+                           component_value=source,\
+                           types=self.source_types,\
+                           locations=self.source_locations,\
+                           tag_ids=self.source_tag_ids,\
+                           table_offsets=self.source_table_offsets,\
+                           table_ids=self.source_table_ids)
+
+        self._append_value(component_value_type=target_type,\
+                           component_value=target,\
+                           types=self.target_types,\
+                           locations=self.target_locations,\
+                           tag_ids=self.target_tag_ids,\
+                           table_offsets=self.target_table_offsets,\
+                           table_ids=self.target_table_ids)
+
+    def _append_value(self,component_value_type:Optional[ComponentValueType],\
+                      component_value:Optional[Union[DBComponentValue,UndefinedComponentValue,BlobComponentValue]],\
+                      types:array,locations:array,tag_ids:array,table_offsets:array,table_ids:array)->None:
+
+        types.append(NULL_CODE if component_value_type is None else COMPONENT_VALUE_TYPE_CODES[component_value_type])
+
+        if not isinstance(component_value,DBComponentValue):
+            locations.append(NULL_CODE)
+            tag_ids.append(NULL_CODE)
+            table_offsets.append(table_offsets[-1])
+            return
+
+        locations.append(LOCATION_TYPE_CODES[component_value.location])
+
+        tag_ids.append(_intern(value=component_value.tag,values=self.tags,value_ids=self._tag_ids))
+
+        for table in component_value.tables:
+            table_ids.append(_intern(value=table,values=self.tables,value_ids=self._table_ids))
+
+        table_offsets.append(len(table_ids))
+
+
+def parse_components_batch(values:Iterable[str])->ComponentColumns:
+    """
+    Parse the user properties values into the columns
+    The same value is only parsed once
+    """
+
+    columns = ComponentColumns()
+
+    parsed:Dict[str,Tuple] = dict()
+
+    for value in values:
+
+        if value not in parsed:
+            parsed[value] = parse_component(value=value)
+
+        (component_type,component) = parsed[value]
+
+        columns.append(component_type=component_type,component=component)
+
+    return columns
+
+
+def _intern(value:str,values:List[str],value_ids:Dict[str,int])->int:
+
+    if value not in value_ids:
+        value_ids[value] = len(values)
+        values.append(value)
+
+    return value_ids[value]
@@ -1,6 +1,7 @@
 from enum import Enum
-from typing import Optional,List,Union,Tuple
+from typing import Optional,Union,Tuple,Dict
 from dataclasses import dataclass
+from collections import OrderedDict
 
 class ComponentType(str,Enum):
     loader="load"
@@ -25,59 +26,131 @@ class LocationType(str,Enum):
     def __str__(self) -> str:
         return self.value
 
-@dataclass
+@dataclass(frozen=True,slots=True)
 class DBComponentValue:
     location:LocationType
     tag:str
-    tables:List[str]
+    tables:Tuple[str,...]
 
-@dataclass
+@dataclass(frozen=True,slots=True)
 class UndefinedComponentValue:
     pass
 
-@dataclass
+# every undefined value share the same object
+
+UNDEFINED_COMPONENT_VALUE = UndefinedComponentValue()
+
+@dataclass(frozen=True,slots=True)
 class BlobComponentValue:
     location:str
 
-@dataclass
+@dataclass(frozen=True,slots=True)
 class LoaderComponent:
     source:Union[DBComponentValue,UndefinedComponentValue,BlobComponentValue]
     target:Union[DBComponentValue,UndefinedComponentValue,BlobComponentValue]
     source_component_value_type:ComponentValueType
     target_component_value_type:ComponentValueType
 
-@dataclass
+@dataclass(frozen=True,slots=True)
 class TransformerComponent:
     source:Union[DBComponentValue,UndefinedComponentValue]
     component_value_type:ComponentValueType
 
-@dataclass
+@dataclass(frozen=True,slots=True)
 class CallerComponent:
     caller_type:str
     caller_value:str
 
 
-def identify_component(value:str)->Optional[ComponentType]:
-    
-    blocks = remove_white_space(value).strip().split(":")
+# lookup table instead of the enum constructor which raise ValueError for unknown value
 
-    component_type = blocks[0]
+COMPONENT_TYPES:Dict[str,ComponentType] = {x.value:x for x in ComponentType}
 
-    try:
-        return ComponentType(component_type)
-    except ValueError:
-        return None
+COMPONENT_VALUE_TYPES:Dict[str,ComponentValueType] = {x.value:x for x in ComponentValueType}
+
+LOCATION_TYPES:Dict[str,LocationType] = {x.value:x for x in LocationType}
+
+DEFAULT_COMPONENT_CACHE_SIZE = 4096
+
+
+def parse_component(value:str)->Tuple[Optional[ComponentType],Optional[Union[LoaderComponent,TransformerComponent,CallerComponent]]]:
+    """
+    Identify and parse the component
+    The white space of the value is only removed once and each part of the value is only scanned once
+    Return (None,None) when it is not a component
+    """
+
+    value = normalize_component(value=value)
+
+    component_type = COMPONENT_TYPES.get(value.partition(":")[0])
+
+    if component_type is None:
+        return (None,None)
     
-def identify_component_value(value:str)->Optional[ComponentValueType]:
+    value = remove_component_identifier(component_type=component_type,value=value)
 
-    blocks = remove_white_space(value).strip().split(":")
+    if component_type==ComponentType.loader:
+        return (component_type,_parse_loader_component(value=value))
+    elif component_type==ComponentType.transformer:
+        return (component_type,_parse_transformer_component(value=value))
+    
+    return (component_type,_parse_caller_component(value=value))
 
-    parser_type = blocks[0]
+class ComponentCache:
+    """
+    Least recently used cache of parse_component keyed on the raw value
 
-    try:
-        return ComponentValueType(parser_type)
-    except ValueError:
-        return None
+    The components are immutable so the cached result can be shared
+    max_size : maximum number of value kept in the cache
+    """
+
+    def __init__(self,max_size:int=DEFAULT_COMPONENT_CACHE_SIZE)->None:
+
+        self.max_size = max_size
+
+        self.hits = 0
+
+        self.misses = 0
+
+        self._components:OrderedDict[str,Tuple[Optional[ComponentType],Optional[Union[LoaderComponent,TransformerComponent,CallerComponent]]]] = OrderedDict()
+
+    def __len__(self)->int:
+        return len(self._components)
+
+    def parse_component(self,value:str)->Tuple[Optional[ComponentType],Optional[Union[LoaderComponent,TransformerComponent,CallerComponent]]]:
+
+        if value in self._components:
+            self.hits+=1
+            self._components.move_to_end(value)
+            return self._components[value]
+
+        self.misses+=1
+
+        result = parse_component(value=value)
+
+        self._components[value] = result
+
+        if len(self._components)>self.max_size:
+            self._components.popitem(last=False)
+
+        return result
+
+    def identify_component(self,value:str)->Optional[ComponentType]:
+        return self.parse_component(value=value)[0]
+
+    def clear(self)->None:
+
+        self._components.clear()
+
+        self.hits = 0
+
+        self.misses = 0
+
+def identify_component(value:str)->Optional[ComponentType]:
+    return COMPONENT_TYPES.get(normalize_component(value=value).partition(":")[0])
+    
+def identify_component_value(value:str)->Optional[ComponentValueType]:
+    return COMPONENT_VALUE_TYPES.get(normalize_component(value=value).partition(":")[0])
     
 def parse_blob_component_value(value:str)->Optional[BlobComponentValue]:
 
@@ -86,48 +159,65 @@ def parse_blob_component_value(value:str)->Optional[BlobComponentValue]:
     return BlobComponentValue(location=value)
 
 def parse_database_component_value(value:str)->Optional[DBComponentValue]:
-        
-    value = remove_white_space(value.strip())
+    return _parse_database_component_value(value=remove_white_space(value))
 
-    blocks = value.split(":")
+def parse_loader_component(value:str)->Optional[LoaderComponent]:
 
-    if len(blocks)!=2:
-        return None
-        
-    location = None
+    value = remove_component_identifier(component_type=ComponentType.loader,\
+                                        value=normalize_component(value=value))
 
-    try:
-        location = LocationType(blocks[0].strip())
-    except ValueError:
-        return None
+    return _parse_loader_component(value=value)
 
-    tag_value = blocks[1].strip()
+def parse_caller_component(value:str)->Optional[CallerComponent]:
 
-    try:
+    value = remove_component_identifier(component_type=ComponentType.caller,\
+                                        value=normalize_component(value=value))
 
-        list_start = tag_value.index("[")
+    return _parse_caller_component(value=value)
 
-    except ValueError:
-        return None
-        
-    last_character = tag_value[-1]
+def parse_transformer_component(value:str)->Optional[TransformerComponent]:
 
-    if last_character!="]":
-        return None
+    value = remove_component_identifier(component_type=ComponentType.transformer,\
+                                        value=normalize_component(value=value))
 
-    tag_name = tag_value[:list_start]
-        
-    tables = tag_value[list_start+1:-1].split(",")
+    return _parse_transformer_component(value=value)
 
-    return DBComponentValue(location=location,\
-                            tag=tag_name,\
-                            tables=tables)
+def parse_component_value(value:str)->Tuple[ComponentValueType,Optional[Union[DBComponentValue,UndefinedComponentValue,BlobComponentValue]]]:
 
-def parse_loader_component(value:str)->Optional[LoaderComponent]:
+    component_value_type = identify_component_value(value=value)
 
-    value = remove_white_space(value.strip())
+    component_value = None
 
-    value = remove_component_identifier(component_type=ComponentType.loader,value=value)
+    if component_value_type is None:
+        return (None,None)
+    
+    value = value.removeprefix(str(component_value_type)+":")
+
+    if component_value_type==ComponentValueType.undefined:
+        component_value = UNDEFINED_COMPONENT_VALUE
+    elif component_value_type==ComponentValueType.blob:
+        component_value = parse_blob_component_value(value=value)
+    elif component_value_type==ComponentValueType.database:
+        component_value = parse_database_component_value(value=value)
+    
+    return (component_value_type,component_value)
+
+
+def remove_component_identifier(component_type:ComponentType,value:str)->str:
+    
+    start_length = len(str(component_type)+":")
+
+    return value[start_length:]
+
+def remove_white_space(value:str)->str:
+    return value.replace(" ","")
+
+def normalize_component(value:str)->str:
+    return remove_white_space(value).strip()
+
+# the parser below expect the value which white space has already been removed
+
+def _parse_loader_component(value:str)->Optional[LoaderComponent]:
 
     target_identifier_index = value.find("|target")
 
@@ -138,11 +228,14 @@ def parse_loader_component(value:str)->Optional[LoaderComponent]:
 
     target_component_value = value[target_identifier_index+1:].removeprefix("target:")
 
-    (source_component_value_type,source) = parse_component_value(value=source_component_value)
+    (source_component_value_type,source) = _parse_component_value(value=source_component_value)
+
+    if source is None:
+        return None
 
-    (target_component_value_type,target) = parse_component_value(value=target_component_value)
+    (target_component_value_type,target) = _parse_component_value(value=target_component_value)
 
-    if source is None or target is None:
+    if target is None:
         return None
 
     return LoaderComponent(
@@ -152,74 +245,71 @@ def parse_loader_component(value:str)->Optional[LoaderComponent]:
         target_component_value_type=target_component_value_type
     )
 
-
-def parse_caller_component(value:str)->Optional[CallerComponent]:
-
-    value = remove_white_space(value.strip())
-
-    value = remove_component_identifier(component_type=ComponentType.caller,value=value)
+def _parse_caller_component(value:str)->Optional[CallerComponent]:
 
     separator_index = value.find("|")
 
     if separator_index<=0:
         return None
     
-    caller_type = value[:separator_index]
-
-    caller_value = value[separator_index+1:]
-
-    return CallerComponent(caller_type=caller_type,\
-                           caller_value=caller_value)
-
-def parse_transformer_component(value:str)->Optional[TransformerComponent]:
-
-    value = remove_white_space(value.strip())
+    return CallerComponent(caller_type=value[:separator_index],\
+                           caller_value=value[separator_index+1:])
 
-    value = remove_component_identifier(component_type=ComponentType.transformer,value=value)
+def _parse_transformer_component(value:str)->Optional[TransformerComponent]:
 
-    allowed_component_value_type = [ComponentValueType.database,ComponentValueType.undefined]
+    (component_value_type,source) = _parse_component_value(value=value)
 
-    component_value_type = identify_component_value(value=value)
-
-    if component_value_type not in allowed_component_value_type:
+    if component_value_type not in [ComponentValueType.database,ComponentValueType.undefined]:
         return None
-    
-    (source_component_value_type,source) = parse_component_value(value=value)
 
     if source is None:
         return None
     
     return TransformerComponent(
         source=source,\
-        component_value_type=source_component_value_type
+        component_value_type=component_value_type
     )
 
-def parse_component_value(value:str)->Tuple[ComponentValueType,Optional[Union[DBComponentValue,UndefinedComponentValue,BlobComponentValue]]]:
-
-    component_value_type = identify_component_value(value=value)
+def _parse_component_value(value:str)->Tuple[Optional[ComponentValueType],Optional[Union[DBComponentValue,UndefinedComponentValue,BlobComponentValue]]]:
 
-    component_value = None
+    component_value_type = COMPONENT_VALUE_TYPES.get(value.strip().partition(":")[0])
 
     if component_value_type is None:
         return (None,None)
     
-    value = value.removeprefix(str(component_value_type)+":")
+    value = value.removeprefix(component_value_type.value+":")
 
     if component_value_type==ComponentValueType.undefined:
-        component_value = UndefinedComponentValue()
+        return (component_value_type,UNDEFINED_COMPONENT_VALUE)
     elif component_value_type==ComponentValueType.blob:
-        component_value = parse_blob_component_value(value=value)
-    elif component_value_type==ComponentValueType.database:
-        component_value = parse_database_component_value(value=value)
+        return (component_value_type,BlobComponentValue(location=value.strip()))
     
-    return (component_value_type,component_value)
+    return (component_value_type,_parse_database_component_value(value=value))
 
+def _parse_database_component_value(value:str)->Optional[DBComponentValue]:
 
-def remove_component_identifier(component_type:ComponentType,value:str)->str:
-    
-    start_length = len(str(component_type)+":")
+    blocks = value.strip().split(":")
 
-    return value[start_length:]
+    if len(blocks)!=2:
+        return None
+        
+    location = LOCATION_TYPES.get(blocks[0].strip())
 
-def remove_white_space(value:str)->str:
-    return value.replace(" ","")
\ No newline at end of file
+    if location is None:
+        return None
+
+    tag_value = blocks[1].strip()
+
+    list_start = tag_value.find("[")
+
+    if list_start<0 or tag_value[-1]!="]":
+        return None
+
+    return DBComponentValue(location=location,\
+                            tag=tag_value[:list_start],\
+                            tables=tuple(tag_value[list_start+1:-1].split(",")))
+
+
+# cache shared by the interpreter
+
+default_component_cache = ComponentCache()
@@ -0,0 +1,195 @@
+import sys
+from array import array
+from typing import List,Dict,Optional
+from graph import Edge
+
+
+class CompactGraph:
+    """
+    Read only graph which store the adjacency as compressed sparse row
+
+    Every node name is interned once to the integer id.
+    The parents of node id x are parent_indices[parent_offsets[x]:parent_offsets[x+1]]
+    and the children of node id x are child_indices[child_offsets[x]:child_offsets[x+1]]
+
+    The node ids [0,node_count) are the nodes of the edges and the remaining ids
+    are the parents which does not exist as node
+    """
+
+    def __init__(self,edges:List[Edge])->None:
+        """
+        edges : valid edges (see is_valid_edges)
+        """
+
+        self.node_names:List[str] = list()
+
+        self.node_ids:Dict[str,int] = dict()
+
+        for edge in edges:
+            self._intern(node_name=edge.node_name)
+
+        self.node_count = len(self.node_names)
+
+        parent_counts = array("i",[0])*self.node_count
+
+        for edge in edges:
+
+            parent_counts[self.node_ids[edge.node_name]]+=len(edge.parent_nodes)
+
+            for parent_node in edge.parent_nodes:
+                self._intern(node_name=parent_node)
+
+        self.parent_offsets = _to_offsets(counts=parent_counts,size=len(self.node_names))
+
+        self.parent_indices = array("i",[0])*self.parent_offsets[-1]
+
+        # next position to write the parent of each node
+
+        cursors = array("i",self.parent_offsets[:-1])
+
+        for edge in edges:
+
+            node_id = self.node_ids[edge.node_name]
+
+            for parent_node in edge.parent_nodes:
+                self.parent_indices[cursors[node_id]] = self.node_ids[parent_node]
+                cursors[node_id]+=1
+
+        # reverse the parents to get the children
+
+        child_counts = array("i",[0])*len(self.node_names)
+
+        for parent_id in self.parent_indices:
+            child_counts[parent_id]+=1
+
+        self.child_offsets = _to_offsets(counts=child_counts,size=len(self.node_names))
+
+        self.child_indices = array("i",[0])*self.child_offsets[-1]
+
+        cursors = array("i",self.child_offsets[:-1])
+
+        for node_id in range(self.node_count):
+            for position in range(self.parent_offsets[node_id],self.parent_offsets[node_id+1]):
+
+                parent_id = self.parent_indices[position]
+
+                self.child_indices[cursors[parent_id]] = node_id
+                cursors[parent_id]+=1
+
+    @classmethod
+    def from_edges(cls,edges:List[Edge])->"CompactGraph":
+        return cls(edges=edges)
+
+    def to_edges(self)->List[Edge]:
+        return [Edge(node_name=self.node_names[x],\
+                     parent_nodes=[self.node_names[y] for y in self._get_parent_ids(node_id=x)])\
+                for x in range(self.node_count)]
+
+    def __len__(self)->int:
+        return self.node_count
+
+    def __contains__(self,node_name:str)->bool:
+        return self.node_ids.get(node_name,self.node_count)<self.node_count
+
+    def get_edge_count(self)->int:
+        return len(self.parent_indices)
+
+    def get_memory_size(self)->int:
+        """
+        Return the size in bytes of the adjacency arrays
+        """
+        return sum([x.itemsize*len(x) for x in [self.parent_offsets,self.parent_indices,\
+                                                self.child_offsets,self.child_indices]])
+
+    def get_node(self,node_name:str)->Optional[Edge]:
+
+        if node_name not in self:
+            return None
+
+        return Edge(node_name=node_name,parent_nodes=self.get_parents(node_name=node_name))
+
+    def get_parents(self,node_name:str)->List[str]:
+
+        if node_name not in self.node_ids:
+            return list()
+
+        return [self.node_names[x] for x in self._get_parent_ids(node_id=self.node_ids[node_name])]
+
+    def get_children(self,node_name:str)->List[str]:
+
+        if node_name not in self.node_ids:
+            return list()
+
+        return [self.node_names[x] for x in self._get_child_ids(node_id=self.node_ids[node_name])]
+
+    def get_ancestors(self,node_name:str)->List[str]:
+        """
+        Return all the node which flow into the node (upstream)
+        """
+        return self._traverse(node_name=node_name,\
+                              offsets=self.parent_offsets,\
+                              indices=self.parent_indices)
+
+    def get_descendants(self,node_name:str)->List[str]:
+        """
+        Return all the node which the node flow into (downstream)
+        """
+        return self._traverse(node_name=node_name,\
+                              offsets=self.child_offsets,\
+                              indices=self.child_indices)
+
+    def _get_parent_ids(self,node_id:int)->array:
+        return self.parent_indices[self.parent_offsets[node_id]:self.parent_offsets[node_id+1]]
+
+    def _get_child_ids(self,node_id:int)->array:
+        return self.child_indices[self.child_offsets[node_id]:self.child_offsets[node_id+1]]
+
+    def _intern(self,node_name:str)->int:
+
+        if node_name not in self.node_ids:
+            self.node_ids[node_name] = len(self.node_names)
+            self.node_names.append(sys.intern(node_name))
+
+        return self.node_ids[node_name]
+
+    def _traverse(self,node_name:str,offsets:array,indices:array)->List[str]:
+        """
+        Return the node reachable from the node in the order they are visited
+        """
+
+        if node_name not in self.node_ids:
+            return list()
+
+        visited = bytearray(len(self.node_names))
+
+        node_ids:List[int] = list()
+
+        stack:List[int] = [self.node_ids[node_name]]
+
+        while len(stack)>0:
+
+            node_id = stack.pop()
+
+            for next_node_id in indices[offsets[node_id]:offsets[node_id+1]]:
+                if not visited[next_node_id]:
+                    visited[next_node_id] = 1
+                    node_ids.append(next_node_id)
+                    stack.append(next_node_id)
+
+        return [self.node_names[x] for x in node_ids]
+
+
+def _to_offsets(counts:array,size:int)->array:
+    """
+    Return the prefix sum of the counts with size+1 items
+    """
+
+    offsets = array("i",[0])*(size+1)
+
+    for index in range(len(counts)):
+        offsets[index+1] = offsets[index]+counts[index]
+
+    for index in range(len(counts),size):
+        offsets[index+1] = offsets[index]
+
+    return offsets
@@ -0,0 +1,192 @@
+from typing import List,Dict,Optional
+from csr import CompactGraph
+from graph import get_strongly_connected_components,_get_closure
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+HAS_NUMPY = numpy is not None
+
+
+class DenseReachability:
+    """
+    Reachability between every pair of node of the (sub)graph
+
+    Use the boolean adjacency matrix with numpy when it is installed
+    otherwise use the bitset closure of the pure python engine
+
+    node_names : node of the subgraph , all the node of the graph when it is None
+    """
+
+    def __init__(self,graph:CompactGraph,\
+                 node_names:Optional[List[str]]=None,\
+                 use_numpy:bool=True)->None:
+
+        if node_names is None:
+            node_names = graph.node_names
+
+        self.node_names:List[str] = [x for x in node_names if x in graph.node_ids]
+
+        self._indices:Dict[str,int] = {x:index for index,x in enumerate(self.node_names)}
+
+        # graph id -> subgraph id
+
+        self._node_ids:Dict[int,int] = {graph.node_ids[x]:index for index,x in enumerate(self.node_names)}
+
+        self._successors:List[List[int]] = list()
+
+        for node_name in self.node_names:
+
+            graph_id = graph.node_ids[node_name]
+
+            self._successors.append([self._node_ids[x] for x in graph._get_child_ids(node_id=graph_id)\
+                                     if x in self._node_ids])
+
+        self.is_numpy = use_numpy and HAS_NUMPY
+
+        if self.is_numpy:
+            self._matrix = _get_closure_matrix(successors=self._successors)
+        else:
+            self._closures = _get_closure(components=get_strongly_connected_components(successors=self._successors),\
+                                          successors=self._successors)
+
+    def count_descendants(self)->Dict[str,int]:
+        """
+        Return node name -> number of node it flow into
+        """
+
+        if self.is_numpy:
+            counts = self._matrix.sum(axis=1).tolist()
+        else:
+            counts = [bin(x).count("1") for x in self._closures]
+
+        return dict(zip(self.node_names,counts))
+
+    def count_ancestors(self)->Dict[str,int]:
+        """
+        Return node name -> number of node which flow into it
+        """
+
+        if self.is_numpy:
+            counts = self._matrix.sum(axis=0).tolist()
+        else:
+            counts = [0]*len(self.node_names)
+
+            for closure in self._closures:
+                while closure:
+                    lowest_bit = closure & -closure
+                    counts[lowest_bit.bit_length()-1]+=1
+                    closure ^= lowest_bit
+
+        return dict(zip(self.node_names,counts))
+
+    def is_reachable(self,node_name:str,descendant_node_name:str)->bool:
+        """
+        Return whether the data of the node flow into the descendant node
+        """
+
+        if node_name not in self._indices or descendant_node_name not in self._indices:
+            return False
+
+        source = self._indices[node_name]
+
+        target = self._indices[descendant_node_name]
+
+        if self.is_numpy:
+            return bool(self._matrix[source,target])
+
+        return (self._closures[source]>>target)&1==1
+
+
+def _get_closure_matrix(successors:List[List[int]])->"numpy.ndarray":
+    """
+    matrix[x,y] is True when y is reachable from x
+    """
+
+    closures = _get_packed_closure(successors=successors)
+
+    # the bit y&63 of the word y>>6 is the bit y%8 of the byte y>>3 in the little endian word
+
+    return numpy.unpackbits(closures.astype("<u8").view(numpy.uint8),axis=1,\
+                            count=len(successors),bitorder="little").astype(bool)
+
+def _get_packed_closure(successors:List[List[int]])->"numpy.ndarray":
+    """
+    Return the closure row of every node packed as the bits of uint64 so that 64 nodes are or-ed at once
+    y is reachable from x when the bit y&63 of closures[x,y>>6] is set
+
+    The strongly connected components are processed by height (the longest path to the last component)
+    and the rows of every component of the same height are computed at once
+    by or-ing the rows of their successor components
+    """
+
+    node_count = len(successors)
+
+    components = get_strongly_connected_components(successors=successors)
+
+    component_ids:List[int] = [0]*node_count
+
+    for component_id,component in enumerate(components):
+        for node in component:
+            component_ids[node] = component_id
+
+    # the successor components are always before the component
+
+    component_successors:List[List[int]] = list()
+
+    heights:List[int] = list()
+
+    is_cycles:List[bool] = list()
+
+    for component_id,component in enumerate(components):
+
+        successor_ids = set([component_ids[y] for x in component for y in successors[x]])
+
+        is_cycles.append(len(component)>1 or component_id in successor_ids)
+
+        successor_ids.discard(component_id)
+
+        component_successors.append(sorted(successor_ids))
+
+        heights.append(max([heights[x]+1 for x in successor_ids],default=0))
+
+    # the member bits are set in the packed rows so that the unpacked rows are never allocated
+
+    members = numpy.zeros((len(components),(node_count+63)//64),dtype=numpy.uint64)
+
+    node_ids = numpy.arange(node_count,dtype=numpy.uint64)
+
+    numpy.bitwise_or.at(members,(numpy.array(component_ids,dtype=numpy.int64),node_ids>>numpy.uint64(6)),\
+                        numpy.uint64(1)<<(node_ids&numpy.uint64(63)))
+
+    # closure row of each component , closure_with_members also include the member of the component
+
+    closures = numpy.zeros(members.shape,dtype=numpy.uint64)
+
+    closures_with_members = members.copy()
+
+    component_heights = numpy.array(heights,dtype=numpy.int64)
+
+    for height in range(1,max(heights,default=0)+1):
+
+        level = numpy.flatnonzero(component_heights==height)
+
+        segment_sizes = [len(component_successors[x]) for x in level]
+
+        flatten_successors = [y for x in level for y in component_successors[x]]
+
+        segment_starts = numpy.cumsum([0]+segment_sizes[:-1])
+
+        closures[level] = numpy.bitwise_or.reduceat(closures_with_members[flatten_successors],\
+                                                    segment_starts,\
+                                                    axis=0)
+
+        closures_with_members[level] |= closures[level]
+
+    cycles = numpy.array(is_cycles,dtype=bool)
+
+    closures[cycles] |= members[cycles]
+
+    return closures[component_ids]
@@ -1,12 +1,19 @@
-from typing import List,Dict,Optional
+from typing import List,Dict,Optional,Set,Tuple,Union,Callable,Iterable,Iterator,Any
+from collections import deque
+from collections.abc import MutableMapping
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Edge:
     node_name:str
     parent_nodes:List[str]
 
+@dataclass(frozen=True,slots=True)
+class FrozenEdge:
+    node_name:str
+    parent_nodes:Tuple[str,...]
+
 
 def is_valid_edge(edge:Edge)->bool:
     return len(edge.parent_nodes)==len(set(edge.parent_nodes))
@@ -135,68 +142,45 @@ def edge_to_dict(edges:List[Edge])->Dict[str,List[str]]:
     return {x.node_name:x.parent_nodes for x in edges}
 
 def merge_edge(left_edges:List[Edge],right_edges:List[Edge])->List[Edge]:
-    
-    merge_edge:List[Edge] = list()
-
-    for left_node in left_edges:
-
-        parents = left_node.parent_nodes
-
-        for right_node in right_edges:
-            """
-            if there are same node in both edge
-            concat the parent
-            """            
-            if left_node.node_name==right_node.node_name:
-                for parent in right_node.parent_nodes:
-                    if parent not in parents:
-                        parents.append(parent)
-        
-        merge_edge.append(
-            Edge
-            (
-                node_name=left_node.node_name,\
-                parent_nodes=parents
-            )
-        )
-
-    left_node_names = [node.node_name for node in left_edges]
-
-    # node which only exists in right edges
-
-    unqiue_right_nodes = [node for node in right_edges if not node.node_name in left_node_names]
-
-    for node in unqiue_right_nodes:
-
-        merge_edge.append(
-            Edge
-            (
-                node_name=node.node_name,\
-                parent_nodes=node.parent_nodes
-            )
-        )
-
-    return merge_edge
+    """
+    if there are same node in both edge
+    concat the parent
+    """
+    return merge_edges(graphs=[left_edges,right_edges])
 
 def merge_edges(graphs:List[List[Edge]])->List[Edge]:
+    """
+    Merge all the graphs in a single pass
+    The node keep the order in which it first appear and
+    the parents are concat in the order in which they first appear
+    """
 
     if len(graphs)==1:
         return graphs[0]
-    
-    left_edge = graphs[0]
 
-    merge_graph = None
+    return merge_node_parents(node_parents=[(edge.node_name,edge.parent_nodes) for edges in graphs for edge in edges])
+
+def merge_node_parents(node_parents:Iterable[Tuple[str,Iterable[str]]])->List[Edge]:
+    """
+    Return the edges of the (node name,parent node names)
+    The node keep the order in which it first appear and
+    the parents are concat in the order in which they first appear
+    """
+
+    merge_parents:Dict[str,Dict[str,None]] = dict()
 
-    for index in range(1,len(graphs)):
+    for (node_name,parent_nodes) in node_parents:
 
-        right_edges = graphs[index]
+        parents = merge_parents.get(node_name)
 
-        merge_graph = merge_edge(left_edges=left_edge,\
-                                 right_edges=right_edges)
-        
-        left_edge = merge_graph
+        if parents is None:
+            parents = merge_parents[node_name] = dict()
+
+        for parent in parent_nodes:
+            parents[parent] = None
 
-    return merge_graph
+    return [Edge(node_name=node_name,parent_nodes=list(parents))\
+            for node_name,parents in merge_parents.items()]
     
 def replace_nodes(node_name:str,replace_node_names:List[str],edges:List[Edge])->Optional[List[Edge]]:
     """
@@ -353,16 +337,9 @@ def replace_node_with_edge(node_name:str,replace_edges:List[Edge],edges:List[Edg
     if get_node(node_name=node_name,edges=edges) is None:
         return None
 
-    first_nodes = get_first_nodes(edges=replace_edges)
+    (first_nodes,last_nodes,disjointed_nodes) = classify_nodes(edges=replace_edges)
 
-    last_nodes = get_last_nodes(edges=replace_edges)
-
-    disjointed_nodes = get_disjointed_nodes(edges=replace_edges)
-
-    back_combine_edges = merge_edge(left_edges=last_nodes,\
-                               right_edges=disjointed_nodes)
-
-    back_combine_node_names = [x.node_name for x in back_combine_edges]
+    back_combine_node_names = [x.node_name for x in last_nodes+disjointed_nodes]
 
     new_edges = join_to_node(node_name=node_name,\
                  concate_edges=replace_edges,\
@@ -373,10 +350,7 @@ def replace_node_with_edge(node_name:str,replace_edges:List[Edge],edges:List[Edg
                          replace_node_names=back_combine_node_names,\
                         edges=new_edges)
     
-    front_combine_edges = merge_edge(left_edges=first_nodes,\
-               right_edges=disjointed_nodes)
-    
-    front_combine_node_names = [x.node_name for x in front_combine_edges]
+    front_combine_node_names = [x.node_name for x in first_nodes+disjointed_nodes]
 
     remove_node_parents = edge_to_dict(new_edges)[node_name]
 
@@ -419,51 +393,54 @@ def replace_node_with_edge(node_name:str,replace_edges:List[Edge],edges:List[Edg
     
     
 
-def get_disjointed_nodes(edges:List[Edge])->List[Edge]:
+def classify_nodes(edges:List[Edge])->Tuple[List[Edge],List[Edge],List[Edge]]:
     """
-    Get node which have no parent and is not used by other nodes
+    Get the first , last and disjointed nodes in a single pass
+    Return (first nodes,last nodes,disjointed nodes)
     """
-    disjointed_nodes:List[Edge] = list()
 
-    for edge in edges:
-        if len(edge.parent_nodes)==0 and\
-              not is_node_parent(node_name=edge.node_name,edges=edges):
-            
-            disjointed_nodes.append(edge)
+    parent_node_names:Set[str] = set()
 
-    return disjointed_nodes    
+    for edge in edges:
+        parent_node_names.update(edge.parent_nodes)
 
-def get_last_nodes(edges:List[Edge])->List[Edge]:
-    """
-    Get the last nodes (excluding disjointed nodes)
-    """
+    first_nodes:List[Edge] = list()
 
     last_nodes:List[Edge] = list()
 
+    disjointed_nodes:List[Edge] = list()
+
     for edge in edges:
-        if len(edge.parent_nodes)>0 and\
-        not is_node_parent(node_name=edge.node_name,edges=edges):
-            
+
+        is_parent = edge.node_name in parent_node_names
+
+        if len(edge.parent_nodes)==0:
+            if is_parent:
+                first_nodes.append(edge)
+            else:
+                disjointed_nodes.append(edge)
+        elif not is_parent:
             last_nodes.append(edge)
-        
 
-    return last_nodes
+    return (first_nodes,last_nodes,disjointed_nodes)
 
-def get_first_nodes(edges:List[Edge])->List[Edge]:
+def get_disjointed_nodes(edges:List[Edge])->List[Edge]:
     """
-    Get the first nodes (excluding disjointed nodes)
+    Get node which have no parent and is not used by other nodes
     """
+    return classify_nodes(edges=edges)[2]
 
-    first_nodes:List[Edge] = list()
-
-    for edge in edges:
-        if len(edge.parent_nodes)==0 and\
-              is_node_parent(node_name=edge.node_name,edges=edges):
-            
-            first_nodes.append(edge)
-
+def get_last_nodes(edges:List[Edge])->List[Edge]:
+    """
+    Get the last nodes (excluding disjointed nodes)
+    """
+    return classify_nodes(edges=edges)[1]
 
-    return first_nodes
+def get_first_nodes(edges:List[Edge])->List[Edge]:
+    """
+    Get the first nodes (excluding disjointed nodes)
+    """
+    return classify_nodes(edges=edges)[0]
 
 
 def join_to_node(node_name:str,concate_edges:List[Edge],edges:List[Edge])->Optional[List[Edge]]:
@@ -475,107 +452,1053 @@ def join_to_node(node_name:str,concate_edges:List[Edge],edges:List[Edge])->Optio
     if get_node(node_name=node_name,edges=edges) is None:
         return None
 
-    first_nodes = get_first_nodes(edges=concate_edges)
+    (first_nodes,_,disjointed_nodes) = classify_nodes(edges=concate_edges)
 
-    disjointed_nodes = get_disjointed_nodes(edges=concate_edges)
+    # the first and disjointed nodes use the join node as parent
+    # unless it is the join node itself
 
-    # whether the join node already exist in new edges we wanted to concate
+    join_node_names:Set[str] = set([x.node_name for x in first_nodes+disjointed_nodes])
 
-    has_join_nodes = get_node(node_name=node_name,edges=concate_edges) is not None
+    join_node_names.discard(node_name)
 
     new_concate_edges:List[Edge] = list()
 
-    if has_join_nodes:
+    for edge in concate_edges:
 
-        new_disjointed_nodes:List[Edge] = list()
+        if edge.node_name in join_node_names:
 
-        for edge in disjointed_nodes:
+            new_concate_edges.append(
+                Edge
+                (
+                    node_name=edge.node_name,\
+                    parent_nodes=[node_name]
+                )
+            )
 
-            #if it is not a node that we wanted to join to add that join node as parents
+            continue
 
-            if edge.node_name!=node_name:
+        new_concate_edges.append(edge)
+            
+    return merge_edge(left_edges=edges,right_edges=new_concate_edges)
 
-                new_disjointed_nodes.append(
-                    Edge
-                    (
-                        node_name=edge.node_name,
-                        parent_nodes=[node_name]
-                    )
-                )
 
-                continue
 
-            new_disjointed_nodes.append(edge)
+class LineageGraph:
+    """
+    Indexed graph store
 
-        new_first_nodes:List[Edge] = list()
+    Keep the parents (forward) and children (reverse) adjacency of every node
+    so that lookup is O(1) and the edit operations are O(degree)
+    instead of scanning the whole List[Edge]
+    """
 
-        for edge in first_nodes:
+    def __init__(self,edges:Optional[List[Edge]]=None)->None:
 
-            #if it is not a node that we wanted to join , add that join node as parent nodes
+        # node name -> ordered set of parent node
+        # the insertion order of the dict is the order of the edges
 
-            if edge.node_name!=node_name:
-                parent_nodes = edge.parent_nodes
-                parent_nodes.append(node_name)
+        self._parents:Dict[str,Dict[str,None]] = dict()
 
-                new_first_nodes.append(
-                    Edge
-                    (
-                        node_name=edge.node_name,\
-                        parent_nodes=parent_nodes
-                    )
-                )
+        # node name -> ordered set of node which use it as parent
+        # it can contains the node name which does not exist as node
+
+        self._children:Dict[str,Dict[str,None]] = dict()
+
+        # increase on every change so that the cached index can be rebuild
+
+        self._version = 0
+
+        self._reachability_index:Optional[ReachabilityIndex] = None
+
+        self._topological_order:Optional[TopologicalOrder] = None
+
+        if edges is not None:
+            for edge in edges:
+                self.add_edge(edge=edge)
+
+    @classmethod
+    def from_edges(cls,edges:List[Edge])->"LineageGraph":
+        return cls(edges=edges)
+
+    def to_edges(self)->List[Edge]:
+        return [Edge(node_name=node_name,parent_nodes=list(parents))\
+                for node_name,parents in self._parents.items()]
+    
+    def copy(self)->"LineageGraph":
+
+        graph = LineageGraph()
+
+        graph._parents = {x:dict(y) for x,y in self._parents.items()}
 
+        graph._children = {x:dict(y) for x,y in self._children.items()}
+
+        return graph
+
+    def __len__(self)->int:
+        return len(self._parents)
+
+    def __contains__(self,node_name:str)->bool:
+        return node_name in self._parents
+
+    def node_names(self)->List[str]:
+        return list(self._parents)
+
+    def add_edge(self,edge:Edge)->None:
+        """
+        Add the edge to the graph
+        If the node already exist , the parents are concat to the existing parents
+        """
+
+        if edge.node_name not in self._parents:
+            self._parents[edge.node_name] = dict()
+            self._version+=1
+
+        for parent_node in edge.parent_nodes:
+            self._add_parent(node_name=edge.node_name,parent_node=parent_node)
+
+    def get_node(self,node_name:str)->Optional[Edge]:
+
+        if node_name not in self._parents:
+            return None
+        
+        return Edge(node_name=node_name,\
+                    parent_nodes=list(self._parents[node_name]))
+
+    def get_parents(self,node_name:str)->List[str]:
+        return list(self._parents.get(node_name,()))
+
+    def get_children(self,node_name:str)->List[str]:
+        """
+        Return the name of node which used the node as parent
+        """
+        return list(self._children.get(node_name,()))
+    
+    def get_used_edge(self,node_name:str)->List[Edge]:
+        return [self.get_node(node_name=x) for x in self.get_children(node_name=node_name)]
+
+    def is_node_parent(self,node_name:str)->bool:
+        return len(self._children.get(node_name,()))>0
+    
+    def force_remove_node(self,node_name:str)->bool:
+        """
+        Forcefully remove the node.
+        The node which use it as parent still keep it as parent
+        """
+
+        if node_name not in self._parents:
+            return False
+        
+        self._version+=1
+
+        for parent_node in self._parents.pop(node_name):
+            self._discard_child(node_name=parent_node,child_node=node_name)
+
+        return True
+
+    def remove_node(self,node_name:str)->bool:
+        """
+        Remove the node and connect its parents to the node which use it
+        """
+
+        if node_name not in self._parents:
+            return False
+        
+        parent_nodes = list(self._parents[node_name])
+
+        self.force_remove_node(node_name=node_name)
+
+        for child_node in self._children.pop(node_name,dict()):
+
+            #concate the parent node of the remove node to the node which is using that remove node
+
+            for parent_node in parent_nodes:
+                if parent_node not in self._parents[child_node]:
+                    self._add_parent(node_name=child_node,parent_node=parent_node)
+
+            #remove the node that we are going to remove as a parents
+
+            del self._writable_parents(node_name=child_node)[node_name]
+
+        return True
+
+    def replace_nodes(self,node_name:str,replace_node_names:List[str])->bool:
+        """
+        Replace the node with new nodes in its places
+        replace_node_names : new node which does not already exist
+        """
+
+        if node_name not in self._parents or node_name in replace_node_names:
+            return False
+        
+        parent_nodes = list(self._parents[node_name])
+
+        for replace_node_name in replace_node_names:
+            self.add_edge(Edge(node_name=replace_node_name,\
+                               parent_nodes=parent_nodes))
+
+        for child_node in self.get_children(node_name=node_name):
+            self._replace_parent(node_name=child_node,\
+                                 old_parent_node=node_name,\
+                                 new_parent_nodes=replace_node_names)
+
+        return self.remove_node(node_name=node_name)
+
+    def replace_node_parents(self,node_name:str,replace_node_names:List[str])->bool:
+        """
+        Just replace the node which is used as parent to the new nodes as parents
+        replace_node_names : node which already exists
+        """
+
+        if node_name in replace_node_names or node_name not in self._parents:
+            return False
+        
+        for replace_node_name in replace_node_names:
+            if replace_node_name not in self._parents:
+                return False
+            
+        for child_node in self.get_children(node_name=node_name):
+
+            if child_node in replace_node_names:
                 continue
 
-            new_first_nodes.append(edge)
+            self._replace_parent(node_name=child_node,\
+                                 old_parent_node=node_name,\
+                                 new_parent_nodes=[x for x in replace_node_names if x!=child_node])
+
+        return True
+
+    def merge_edge(self,edges:List[Edge])->None:
+        """
+        Merge the edges into the graph
+        """
+        for edge in edges:
+            self.add_edge(edge=edge)
+
+    def join_to_node(self,node_name:str,concate_edges:List[Edge])->bool:
+        """
+        Join the concate_edge to the existing node
+        concate_edges : new edge to join
+        """
 
+        if node_name not in self._parents:
+            return False
+        
         for edge in concate_edges:
 
-            first_node = get_node(edge.node_name,edges=new_first_nodes)
+            #the first and disjointed nodes of the concate edges use the join node as parent
 
-            is_in_first_node = first_node is not None
+            if len(edge.parent_nodes)==0 and edge.node_name!=node_name:
+                self.add_edge(Edge(node_name=edge.node_name,parent_nodes=[node_name]))
+                continue
 
-            disjointed_node = get_node(edge.node_name,edges=new_disjointed_nodes)
+            self.add_edge(edge=edge)
 
-            is_in_disjointed_nodes = disjointed_node is not None
+        return True
+    
+    def replace_node_with_edge(self,node_name:str,replace_edges:List[Edge])->bool:
+        """
+        Replace the node with edges
 
-            if is_in_first_node:
-                new_concate_edges.append(first_node)
-            elif is_in_disjointed_nodes:
-                new_concate_edges.append(disjointed_node)
-            else:
-                new_concate_edges.append(edge)
+        replace_edge : edge to replace with. The replace_edge should not be existing edge
+        """
 
-    else:
+        if node_name not in self._parents:
+            return False
+        
+        (first_nodes,last_nodes,disjointed_nodes) = classify_nodes(edges=replace_edges)
 
-        # no join nodes has been found , we just have to add them as new edge
+        back_combine_node_names = [x.node_name for x in last_nodes+disjointed_nodes]
 
-        for edge in concate_edges:
+        front_combine_node_names = [x.node_name for x in first_nodes+disjointed_nodes]
 
-            is_in_first_node = get_node(edge.node_name,edges=first_nodes) is not None
+        self.join_to_node(node_name=node_name,concate_edges=replace_edges)
 
-            is_in_disjointed_nodes = get_node(edge.node_name,edges=disjointed_nodes) is not None
+        self.replace_node_parents(node_name=node_name,\
+                                  replace_node_names=back_combine_node_names)
+        
+        #the parent of the remove node become the parent of front and disjointed node of replace edges
 
-            #add the node that we wanted to join as parent 
+        for front_node_name in front_combine_node_names:
+            self.add_edge(Edge(node_name=front_node_name,\
+                               parent_nodes=list(self._parents[node_name])))
 
-            if is_in_first_node or is_in_disjointed_nodes:
+        return self.remove_node(node_name=node_name)
 
-                parent_nodes = edge.parent_nodes
-                parent_nodes.append(node_name)
+    def get_reachability_index(self)->"ReachabilityIndex":
+        """
+        Return the reachability index of the graph
+        The index is only rebuild when the graph has changed
+        """
 
-                new_concate_edges.append(
-                    Edge
-                    (
-                        node_name=edge.node_name,\
-                        parent_nodes=parent_nodes
-                    )
-                )
+        if self._reachability_index is None or\
+            self._reachability_index.version!=self._version:
+
+            self._reachability_index = ReachabilityIndex(graph=self)
+
+        return self._reachability_index
+
+    def get_ancestors(self,node_name:str)->List[str]:
+        """
+        Return all the node which flow into the node (upstream)
+        """
+        return self.get_reachability_index().get_ancestors(node_name=node_name)
+
+    def get_descendants(self,node_name:str)->List[str]:
+        """
+        Return all the node which the node flow into (downstream)
+        """
+        return self.get_reachability_index().get_descendants(node_name=node_name)
+
+    def get_topological_order(self)->"TopologicalOrder":
+        """
+        Return the topological order of the graph
+        The order is only sort again when the graph has changed
+        """
+
+        if self._topological_order is None or\
+            self._topological_order.version!=self._version:
+
+            self._topological_order = sort_topologically(graph=self)
+
+        return self._topological_order
+
+    def contract_nodes(self,node_names:Set[str])->None:
+        """
+        Remove all the nodes and connect their parents to the node which use them
+        The nodes are removed in topological order so that each removed node
+        only pass the remaining parents to its children
+        """
+
+        removable_node_names = [x for x in self._parents if x in node_names]
+
+        # number of parent of the node which are also going to be removed
+
+        removable_parent_count:Dict[str,int] = {x:0 for x in removable_node_names}
+
+        for node_name in removable_node_names:
+            removable_parent_count[node_name] = len([x for x in self._parents[node_name]\
+                                                     if x in removable_parent_count])
+
+        ready_node_names = deque([x for x in removable_node_names if removable_parent_count[x]==0])
+
+        while len(ready_node_names)>0:
+
+            node_name = ready_node_names.popleft()
+
+            for child_node in self.get_children(node_name=node_name):
+                if child_node in removable_parent_count and child_node!=node_name:
+                    removable_parent_count[child_node]-=1
+
+                    if removable_parent_count[child_node]==0:
+                        ready_node_names.append(child_node)
+
+            del removable_parent_count[node_name]
+
+            self.remove_node(node_name=node_name)
+
+        # node which are in cycle are removed one by one
+
+        for node_name in removable_node_names:
+            if node_name in removable_parent_count:
+                self.remove_node(node_name=node_name)
+
+    def _add_parent(self,node_name:str,parent_node:str)->None:
+
+        self._writable_parents(node_name=node_name)[parent_node] = None
+
+        self._writable_children(node_name=parent_node)[node_name] = None
+
+    def _discard_child(self,node_name:str,child_node:str)->None:
+
+        if node_name not in self._children:
+            return
+        
+        children = self._writable_children(node_name=node_name)
+        
+        children.pop(child_node,None)
+
+        if len(children)==0:
+            del self._children[node_name]
+
+    def _replace_parent(self,node_name:str,old_parent_node:str,new_parent_nodes:List[str])->None:
+
+        del self._writable_parents(node_name=node_name)[old_parent_node]
+
+        self._discard_child(node_name=old_parent_node,child_node=node_name)
+
+        for parent_node in new_parent_nodes:
+            self._add_parent(node_name=node_name,parent_node=parent_node)
+
+    def _writable_parents(self,node_name:str)->Dict[str,None]:
+
+        self._version+=1
+
+        return self._parents[node_name]
+
+    def _writable_children(self,node_name:str)->Dict[str,None]:
+
+        self._version+=1
+
+        if node_name not in self._children:
+            self._children[node_name] = dict()
+
+        return self._children[node_name]
+
+def contract_nodes(node_names:Set[str],edges:List[Edge])->List[Edge]:
+    """
+    Remove all the nodes in a single pass
+    The parents of the removed nodes are connected to the node which use them
+    same as calling remove_node for each node
+    """
+
+    graph = LineageGraph.from_edges(edges=edges)
+
+    graph.contract_nodes(node_names=node_names)
+
+    return graph.to_edges()
+
+
+# number of layer of the derived graph before the layers are flatten into one dict
+# so that the lookup does not grow with the number of edit
+
+MAX_LAYER_DEPTH = 16
+
+# value of the key which is removed in the layer but still exist in the base
+
+_REMOVED = object()
+
+_MISSING = object()
+
+
+class _LayeredDict(MutableMapping):
+    """
+    Dict which only store the key written to it and read the other key from the base
+    The base must not be changed after the dict is layered on it
+    The iteration read the items of the layers at the time it start
+
+    The iteration order is same as the dict which is copied from the base and then edited
+    """
+
+    def __init__(self,base:Optional["_LayeredDict"]=None)->None:
+
+        self._base = base
+
+        self._layer:Dict[str,Any] = dict()
+
+        # key which is removed from the base and added again so that it is iterated at its new position
+
+        self._moved:Set[str] = set()
+
+        self._size = 0 if base is None else len(base)
+
+        self.depth = 0 if base is None else base.depth+1
+
+    @classmethod
+    def derive(cls,base:"_LayeredDict")->"_LayeredDict":
+
+        if base.depth<MAX_LAYER_DEPTH:
+            return cls(base=base)
+
+        return cls(base=base.flatten())
+
+    def flatten(self)->"_LayeredDict":
+        """
+        Return the dict without the base which has the same items
+        """
+
+        layered_dicts:List[_LayeredDict] = list()
+
+        layered_dict:Optional[_LayeredDict] = self
+
+        while layered_dict is not None:
+            layered_dicts.append(layered_dict)
+            layered_dict = layered_dict._base
+
+        items = dict(layered_dicts[-1]._layer)
+
+        # the layer are applied from the bottom one
+
+        for layered_dict in reversed(layered_dicts[:-1]):
+            for key,value in layered_dict._layer.items():
+
+                if value is _REMOVED or key in layered_dict._moved:
+                    items.pop(key,None)
+
+                if value is not _REMOVED:
+                    items[key] = value
+
+        flatten = _LayeredDict()
+
+        flatten._layer = items
+
+        flatten._size = len(items)
+
+        return flatten
+
+    def _lookup(self,key:str)->Any:
+
+        layered_dict:Optional[_LayeredDict] = self
+
+        while layered_dict is not None:
+
+            value = layered_dict._layer.get(key,_MISSING)
+
+            if value is not _MISSING:
+                return _MISSING if value is _REMOVED else value
+
+            layered_dict = layered_dict._base
+
+        return _MISSING
+
+    def __getitem__(self,key:str)->Any:
+
+        value = self._lookup(key=key)
+
+        if value is _MISSING:
+            raise KeyError(key)
+
+        return value
+
+    def get(self,key:str,default:Any=None)->Any:
+
+        value = self._lookup(key=key)
+
+        return default if value is _MISSING else value
+
+    def __contains__(self,key:object)->bool:
+        return self._lookup(key=key) is not _MISSING
+
+    def __len__(self)->int:
+        return self._size
+
+    def __setitem__(self,key:str,value:Any)->None:
+
+        previous_value = self._layer.get(key,_MISSING)
+
+        if previous_value is _REMOVED:
+            # the key is added again at the end
+            del self._layer[key]
+            self._moved.add(key)
+            self._size+=1
+        elif previous_value is _MISSING and key not in self:
+            self._size+=1
+
+        self._layer[key] = value
+
+    def __delitem__(self,key:str)->None:
+
+        if key not in self:
+            raise KeyError(key)
+
+        if self._base is not None and key in self._base:
+            self._layer[key] = _REMOVED
+            self._moved.discard(key)
+        else:
+            del self._layer[key]
+
+        self._size-=1
+
+    def __iter__(self)->Iterator[str]:
+        return iter(self._get_items())
+
+    def items(self)->Any:
+        return self._get_items().items()
+
+    def values(self)->Any:
+        return self._get_items().values()
+
+    def _get_items(self)->Dict[str,Any]:
+        """
+        Return the items of every layer in one dict
+        the whole graph is read once instead of looking up every key through the layers
+        """
+
+        if self._base is None:
+            return self._layer
+
+        return self.flatten()._layer
+
+
+class _CopyOnWriteLineageGraph(LineageGraph):
+    """
+    LineageGraph which share the parents and children of the node
+    with the graph it is derived from until they are modified
+
+    The node index are layered (see _LayeredDict) so that deriving the graph
+    only store the node which are written instead of copying every node
+    """
+
+    def __init__(self)->None:
+
+        super().__init__()
+
+        self._parents = _LayeredDict()
+
+        self._children = _LayeredDict()
+
+        # node which parents/children are not shared with other graph
+
+        self._owned_parents:Set[str] = set()
+
+        self._owned_children:Set[str] = set()
+
+    def derive(self)->"_CopyOnWriteLineageGraph":
+
+        graph = _CopyOnWriteLineageGraph()
+
+        graph._parents = _LayeredDict.derive(base=self._parents)
+
+        graph._children = _LayeredDict.derive(base=self._children)
+
+        return graph
+
+    def _writable_parents(self,node_name:str)->Dict[str,None]:
+
+        self._version+=1
+
+        if node_name not in self._owned_parents:
+            self._parents[node_name] = dict(self._parents[node_name])
+            self._owned_parents.add(node_name)
+
+        return self._parents[node_name]
+
+    def _writable_children(self,node_name:str)->Dict[str,None]:
+
+        self._version+=1
+
+        if node_name not in self._owned_children or node_name not in self._children:
+            self._children[node_name] = dict(self._children.get(node_name,()))
+            self._owned_children.add(node_name)
+
+        return self._children[node_name]
+
+
+class FrozenLineageGraph:
+    """
+    Immutable LineageGraph
+
+    The edit operation return the new graph (or None when the edit is not possible)
+    and leave the original graph unchanged. The new graph share the unchanged
+    nodes with the original graph so no deep copy is needed
+    """
+
+    def __init__(self,edges:Optional[List[Union[Edge,FrozenEdge]]]=None)->None:
+
+        self._graph = _CopyOnWriteLineageGraph()
+
+        if edges is not None:
+            self._graph.merge_edge(edges=edges)
+
+    @classmethod
+    def from_edges(cls,edges:List[Union[Edge,FrozenEdge]])->"FrozenLineageGraph":
+        return cls(edges=edges)
+    
+    def to_edges(self)->List[Edge]:
+        return self._graph.to_edges()
+    
+    def to_frozen_edges(self)->List[FrozenEdge]:
+        return [FrozenEdge(node_name=node_name,parent_nodes=tuple(parents))\
+                for node_name,parents in self._graph._parents.items()]
+
+    def __len__(self)->int:
+        return len(self._graph)
+
+    def __contains__(self,node_name:str)->bool:
+        return node_name in self._graph
+    
+    def node_names(self)->List[str]:
+        return self._graph.node_names()
+    
+    def get_node(self,node_name:str)->Optional[FrozenEdge]:
+
+        if node_name not in self._graph:
+            return None
+
+        return FrozenEdge(node_name=node_name,\
+                          parent_nodes=tuple(self._graph._parents[node_name]))
+    
+    def get_parents(self,node_name:str)->Tuple[str,...]:
+        return tuple(self._graph.get_parents(node_name=node_name))
+    
+    def get_children(self,node_name:str)->Tuple[str,...]:
+        return tuple(self._graph.get_children(node_name=node_name))
+    
+    def is_node_parent(self,node_name:str)->bool:
+        return self._graph.is_node_parent(node_name=node_name)
+    
+    def get_ancestors(self,node_name:str)->List[str]:
+        return self._graph.get_ancestors(node_name=node_name)
+    
+    def get_descendants(self,node_name:str)->List[str]:
+        return self._graph.get_descendants(node_name=node_name)
+    
+    def get_topological_order(self)->"TopologicalOrder":
+        return self._graph.get_topological_order()
+    
+    def force_remove_node(self,node_name:str)->Optional["FrozenLineageGraph"]:
+        return self._edit(lambda graph:graph.force_remove_node(node_name=node_name))
+
+    def remove_node(self,node_name:str)->Optional["FrozenLineageGraph"]:
+        return self._edit(lambda graph:graph.remove_node(node_name=node_name))
+    
+    def contract_nodes(self,node_names:Set[str])->"FrozenLineageGraph":
+        return self._edit(lambda graph:graph.contract_nodes(node_names=node_names))
+    
+    def replace_nodes(self,node_name:str,replace_node_names:List[str])->Optional["FrozenLineageGraph"]:
+        return self._edit(lambda graph:graph.replace_nodes(node_name=node_name,\
+                                                           replace_node_names=replace_node_names))
+    
+    def replace_node_parents(self,node_name:str,replace_node_names:List[str])->Optional["FrozenLineageGraph"]:
+        return self._edit(lambda graph:graph.replace_node_parents(node_name=node_name,\
+                                                                  replace_node_names=replace_node_names))
+    
+    def merge_edge(self,edges:List[Union[Edge,FrozenEdge]])->"FrozenLineageGraph":
+        return self._edit(lambda graph:graph.merge_edge(edges=edges))
+    
+    def join_to_node(self,node_name:str,concate_edges:List[Union[Edge,FrozenEdge]])->Optional["FrozenLineageGraph"]:
+        return self._edit(lambda graph:graph.join_to_node(node_name=node_name,\
+                                                          concate_edges=concate_edges))
+    
+    def replace_node_with_edge(self,node_name:str,replace_edges:List[Union[Edge,FrozenEdge]])->Optional["FrozenLineageGraph"]:
+        return self._edit(lambda graph:graph.replace_node_with_edge(node_name=node_name,\
+                                                                    replace_edges=replace_edges))
+
+    def _edit(self,edit:Callable[[_CopyOnWriteLineageGraph],Optional[bool]])->Optional["FrozenLineageGraph"]:
+        """
+        Apply the edit to the derived graph
+        edit : return False when the edit is not possible
+        """
+
+        graph = self._graph.derive()
+
+        if edit(graph) is False:
+            return None
+        
+        frozen_graph = FrozenLineageGraph()
+
+        frozen_graph._graph = graph
+
+        return frozen_graph
+
+
+@dataclass
+class TopologicalOrder:
+    """
+    levels : nodes which can be run in parallel , the nodes in the same cycle share the level
+    cycles : nodes which are in the same cycle
+    node_levels : node name -> index of the level
+    version : version of the graph which is sorted
+    """
+    levels:List[List[str]]
+    cycles:List[List[str]]
+    node_levels:Dict[str,int]
+    version:int
+
+    def is_acyclic(self)->bool:
+        return len(self.cycles)==0
+    
+    def get_order(self)->List[str]:
+        return [node_name for level in self.levels for node_name in level]
+
+
+def sort_topologically(graph:LineageGraph)->TopologicalOrder:
+    """
+    Kahn's algorithm over the strongly connected components of the graph
+    Only the nodes which exist in the graph are sorted , the parent which is not the node is ignored
+    """
+
+    node_names:List[str] = list(graph._parents)
+
+    node_ids:Dict[str,int] = {x:index for index,x in enumerate(node_names)}
+
+    successors:List[List[int]] = [[node_ids[x] for x in graph._children.get(node_name,())]\
+                                  for node_name in node_names]
+    
+    components = get_strongly_connected_components(successors=successors)
+
+    # order the component and its member by the order of the node in the graph
+
+    for component in components:
+        component.sort()
+
+    components.sort(key=lambda x:x[0])
+
+    component_ids:List[int] = [0]*len(node_names)
+
+    for component_id,component in enumerate(components):
+        for node in component:
+            component_ids[node] = component_id
+
+    cycles:List[List[str]] = list()
+
+    parent_counts:List[int] = [0]*len(components)
+
+    for component_id,component in enumerate(components):
+
+        is_cycle = len(component)>1
+
+        for node in component:
+            for successor in successors[node]:
+
+                if component_ids[successor]==component_id:
+                    is_cycle = True
+                    continue
+
+                parent_counts[component_ids[successor]]+=1
+
+        if is_cycle:
+            cycles.append([node_names[x] for x in component])
+
+    levels:List[List[str]] = list()
+
+    node_levels:Dict[str,int] = dict()
+
+    current_level:List[int] = [x for x in range(len(components)) if parent_counts[x]==0]
+
+    while len(current_level)>0:
+
+        level:List[str] = list()
+
+        next_level:List[int] = list()
+
+        for component_id in current_level:
+            for node in components[component_id]:
+
+                level.append(node_names[node])
+
+                node_levels[node_names[node]] = len(levels)
+
+                for successor in successors[node]:
+
+                    successor_component_id = component_ids[successor]
+
+                    if successor_component_id==component_id:
+                        continue
+
+                    parent_counts[successor_component_id]-=1
+
+                    if parent_counts[successor_component_id]==0:
+                        next_level.append(successor_component_id)
+
+        levels.append(level)
+
+        current_level = sorted(next_level)
+
+    return TopologicalOrder(levels=levels,\
+                            cycles=cycles,\
+                            node_levels=node_levels,\
+                            version=graph._version)
+
+
+class ReachabilityIndex:
+    """
+    Transitive closure of the LineageGraph
+
+    Every node (including parent which does not exist as node) is interned
+    to an integer id and the ancestors/descendants of the node are kept
+    as the bitset (python int) over the ids.
+    The node which is in the cycle is its own ancestor and descendant
+    """
+
+    def __init__(self,graph:LineageGraph)->None:
+
+        self.version = graph._version
+
+        self._node_names:List[str] = list(graph._parents)
+
+        for node_name in graph._children:
+            if node_name not in graph._parents:
+                self._node_names.append(node_name)
+
+        self._node_ids:Dict[str,int] = {x:index for index,x in enumerate(self._node_names)}
+
+        successors:List[List[int]] = [[self._node_ids[x] for x in graph._children.get(node_name,())]\
+                                      for node_name in self._node_names]
+        
+        predecessors:List[List[int]] = [[self._node_ids[x] for x in graph._parents.get(node_name,())]\
+                                        for node_name in self._node_names]
+        
+        components = get_strongly_connected_components(successors=successors)
+
+        # components are in reverse topological order (last node first)
+
+        self._descendants = _get_closure(components=components,\
+                                         successors=successors)
+        
+        self._ancestors = _get_closure(components=list(reversed(components)),\
+                                       successors=predecessors)
+        
+    def __contains__(self,node_name:str)->bool:
+        return node_name in self._node_ids
+
+    def get_ancestors(self,node_name:str)->List[str]:
+
+        if node_name not in self._node_ids:
+            return list()
+
+        return self._to_node_names(self._ancestors[self._node_ids[node_name]])
+    
+    def get_descendants(self,node_name:str)->List[str]:
+
+        if node_name not in self._node_ids:
+            return list()
+
+        return self._to_node_names(self._descendants[self._node_ids[node_name]])
+    
+    def is_ancestor(self,ancestor_node_name:str,node_name:str)->bool:
+        """
+        Return whether the data of ancestor node flow into the node
+        """
+
+        if ancestor_node_name not in self._node_ids or node_name not in self._node_ids:
+            return False
+        
+        return (self._ancestors[self._node_ids[node_name]]>>self._node_ids[ancestor_node_name])&1==1
+    
+    def count_ancestors(self,node_name:str)->int:
+
+        if node_name not in self._node_ids:
+            return 0
+        
+        return bin(self._ancestors[self._node_ids[node_name]]).count("1")
+    
+    def count_descendants(self,node_name:str)->int:
+
+        if node_name not in self._node_ids:
+            return 0
+        
+        return bin(self._descendants[self._node_ids[node_name]]).count("1")
+    
+    def _to_node_names(self,bits:int)->List[str]:
+
+        node_names:List[str] = list()
+
+        while bits:
+            lowest_bit = bits & -bits
+            node_names.append(self._node_names[lowest_bit.bit_length()-1])
+            bits ^= lowest_bit
+
+        return node_names
+    
+
+def get_strongly_connected_components(successors:List[List[int]])->List[List[int]]:
+    """
+    Tarjan's algorithm without recursion
+    successors : successor ids of each node id
+    Return the components in reverse topological order
+    """
+
+    node_count = len(successors)
+
+    indices:List[int] = [-1]*node_count
+
+    low_links:List[int] = [0]*node_count
+
+    on_stack:List[bool] = [False]*node_count
+
+    stack:List[int] = list()
+
+    components:List[List[int]] = list()
+
+    next_index = 0
+
+    for root in range(node_count):
+
+        if indices[root]!=-1:
+            continue
+
+        indices[root] = low_links[root] = next_index
+        next_index+=1
+        stack.append(root)
+        on_stack[root] = True
+
+        work:List[Tuple[int,int]] = [(root,0)]
+
+        while len(work)>0:
+
+            (node,position) = work[-1]
+
+            if position<len(successors[node]):
+
+                work[-1] = (node,position+1)
+
+                successor = successors[node][position]
+
+                if indices[successor]==-1:
+                    indices[successor] = low_links[successor] = next_index
+                    next_index+=1
+                    stack.append(successor)
+                    on_stack[successor] = True
+                    work.append((successor,0))
+                elif on_stack[successor]:
+                    low_links[node] = min(low_links[node],indices[successor])
 
                 continue
 
-            new_concate_edges.append(edge)
-            
-    return merge_edge(left_edges=edges,right_edges=new_concate_edges)
+            work.pop()
+
+            if len(work)>0:
+                caller = work[-1][0]
+                low_links[caller] = min(low_links[caller],low_links[node])
+
+            if low_links[node]==indices[node]:
+
+                component:List[int] = list()
+
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+
+                    if member==node:
+                        break
+
+                components.append(component)
+
+    return components
+
+def _get_closure(components:List[List[int]],successors:List[List[int]])->List[int]:
+    """
+    components : components ordered so that the successors component come first
+    Return the bitset of the node reachable from each node
+    """
+
+    component_ids:List[int] = [0]*len(successors)
+
+    component_bits:List[int] = list()
+
+    for component_id,component in enumerate(components):
+
+        bits = 0
+
+        for node in component:
+            component_ids[node] = component_id
+            bits |= 1<<node
+
+        component_bits.append(bits)
+
+    component_closures:List[int] = [0]*len(components)
+
+    for component_id,component in enumerate(components):
+
+        closure = 0
+
+        is_cycle = len(component)>1
+
+        for node in component:
+            for successor in successors[node]:
+
+                successor_component_id = component_ids[successor]
+
+                if successor_component_id==component_id:
+                    is_cycle = True
+                    continue
+
+                closure |= component_closures[successor_component_id] | component_bits[successor_component_id]
 
+        if is_cycle:
+            closure |= component_bits[component_id]
 
+        component_closures[component_id] = closure
 
+    return [component_closures[component_ids[node]] for node in range(len(successors))]
@@ -0,0 +1,197 @@
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List,Dict,Optional,Union
+from dataclasses import dataclass
+from graph import Edge
+from vih import VIH,get_vih,iter_vih_statements,vihs_to_edges
+from cache import VIHCache,CachedVIH,get_content_hash
+
+SQL_FILE_EXTENSION = ".sql"
+
+DEFAULT_SCHEMA = "dbo"
+
+DEFAULT_SCAN_CHUNK_SIZE = 16
+
+# create [or alter] proc[edure] [schema].[procedure]
+
+NAME_PART = r"(?:\[[^\]]+\]|[\w@#$]+)"
+
+PROCEDURE_PATTERN = re.compile(r"\bcreate\s+(?:or\s+alter\s+)?proc(?:edure)?\s+("+\
+                               NAME_PART+r"(?:\s*\.\s*"+NAME_PART+r")*)",\
+                               re.IGNORECASE)
+
+
+@dataclass(frozen=True,slots=True)
+class SQLFile:
+    """
+    default_name : file name without the extension which is the procedure name
+                   when there is no create procedure statement
+    is_cached : whether the cached vih is from the cache
+    """
+    default_name:str
+    content_hash:str
+    cached_vih:CachedVIH
+    is_cached:bool
+
+    def get_procedure_name(self)->str:
+
+        if self.cached_vih.procedure_name is None:
+            return self.default_name
+
+        return self.cached_vih.procedure_name
+
+
+def get_procedure_name(text:str,default_name:str)->str:
+    """
+    Return schema.procedure of the first create procedure statement
+    which is the name used in transform:db:...[schema.procedure]
+
+    default_name : name when there is no create procedure statement
+    """
+
+    procedure_name = find_procedure_name(text=text)
+
+    if procedure_name is None:
+        return default_name
+
+    return procedure_name
+
+def find_procedure_name(text:str)->Optional[str]:
+    """
+    Return schema.procedure of the first create procedure statement
+    Return None when there is no create procedure statement
+    """
+
+    match = PROCEDURE_PATTERN.search(text)
+
+    if match is None:
+        return None
+
+    parts = [x.strip().replace("[","").replace("]","") for x in match.group(1).split(".")]
+
+    if len(parts)==1:
+        return DEFAULT_SCHEMA+"."+parts[0]
+
+    return parts[-2]+"."+parts[-1]
+
+def get_sql_files(directory:Union[str,os.PathLike])->List[str]:
+    """
+    Return the path of every sql file under the directory in sorted order
+    """
+
+    paths:List[str] = list()
+
+    for (root,_,file_names) in os.walk(directory):
+        for file_name in file_names:
+            if file_name.lower().endswith(SQL_FILE_EXTENSION):
+                paths.append(os.path.join(root,file_name))
+
+    return sorted(paths)
+
+def parse_sql(data:bytes,encoding:str="utf-8")->CachedVIH:
+    """
+    Return the procedure name (see find_procedure_name) and the vih of every vih block
+    vih is None when any of the vih block is invalid and
+    empty when the sql does not contain vih block
+    """
+
+    procedure_name = find_procedure_name(text=data.decode(encoding,errors="replace"))
+
+    vihs:List[VIH] = list()
+
+    for (_,vih_statement) in iter_vih_statements(source=io.BytesIO(data),encoding=encoding):
+
+        vih = get_vih(vih_statement=vih_statement)
+
+        if vih is None:
+            return CachedVIH(procedure_name=procedure_name,vihs=None)
+
+        vihs.extend(vih)
+
+    return CachedVIH(procedure_name=procedure_name,vihs=vihs)
+
+def scan_sql_file(path:str,encoding:str="utf-8",cache:Optional[VIHCache]=None)->SQLFile:
+    """
+    cache : the vih is looked up in the cache but new vih is not stored
+    """
+
+    with open(path,"rb") as file:
+        data = file.read()
+
+    content_hash = get_content_hash(data=data)
+
+    cached_vih = None if cache is None else cache.get(content_hash=content_hash)
+
+    is_cached = cached_vih is not None
+
+    if cached_vih is None:
+        cached_vih = parse_sql(data=data,encoding=encoding)
+
+    return SQLFile(default_name=os.path.splitext(os.path.basename(path))[0],\
+                   content_hash=content_hash,\
+                   cached_vih=cached_vih,\
+                   is_cached=is_cached)
+
+def scan_sql_files(paths:List[str],encoding:str="utf-8",\
+                   cache_path:Optional[Union[str,os.PathLike]]=None)->List[SQLFile]:
+    """
+    Scan the files with the cache which is opened only while the files are scanned
+    """
+
+    if cache_path is None:
+        return [scan_sql_file(path=x,encoding=encoding) for x in paths]
+
+    with VIHCache(path=cache_path) as cache:
+        return [scan_sql_file(path=x,encoding=encoding,cache=cache) for x in paths]
+
+def scan_sql_directory(directory:Union[str,os.PathLike],\
+                       max_workers:Optional[int]=None,\
+                       chunk_size:int=DEFAULT_SCAN_CHUNK_SIZE,\
+                       encoding:str="utf-8",\
+                       cache_path:Optional[Union[str,os.PathLike]]=None)->Dict[str,Optional[List[Edge]]]:
+    """
+    Read and parse the vih of every sql file under the directory in the process pool
+    Return schema.procedure -> vih edges , the edges is None when the vih is invalid
+
+    The file without vih block are skipped.
+    When the procedure is in more than one file , the file last in the path order is used
+
+    max_workers : number of process , the files are scanned in this process when it is 1
+    chunk_size : number of file sent to the process at once
+    cache_path : sqlite file of the vih cache (see VIHCache) , the file which is not changed is not parsed again
+    """
+
+    paths = get_sql_files(directory=directory)
+
+    if max_workers==1:
+        sql_files = scan_sql_files(paths=paths,encoding=encoding,cache_path=cache_path)
+    else:
+        # each chunk open and close its own connection to the cache
+
+        chunks = [paths[x:x+chunk_size] for x in range(0,len(paths),chunk_size)]
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            sql_files = [y for x in executor.map(scan_sql_files,chunks,\
+                                                 [encoding]*len(chunks),\
+                                                 [cache_path]*len(chunks)) for y in x]
+
+    # the new vih is only stored by this process after the files are scanned
+
+    if cache_path is not None:
+        with VIHCache(path=cache_path) as cache:
+            cache.put_many(items=[(x.content_hash,x.cached_vih) for x in sql_files if not x.is_cached])
+
+    procedures:Dict[str,Optional[List[Edge]]] = dict()
+
+    for sql_file in sql_files:
+
+        vihs = sql_file.cached_vih.vihs
+
+        if vihs is None:
+            procedures[sql_file.get_procedure_name()] = None
+        elif len(vihs)>0:
+            procedures[sql_file.get_procedure_name()] = vihs_to_edges(vihs=vihs)
+
+    return procedures
@@ -0,0 +1,275 @@
+import heapq
+from typing import Dict,List,Optional,Union
+from dataclasses import dataclass
+from statistics import mean,pstdev
+from graph import LineageGraph
+
+# slack smaller than this is treated as zero
+
+SLACK_TOLERANCE = 1e-9
+
+@dataclass
+class Duration:
+    """
+    expected : expected run time of the node
+    deviation : standard deviation of the run time
+    """
+    expected:float
+    deviation:float=0.0
+
+    @classmethod
+    def from_samples(cls,samples:List[float])->"Duration":
+        return cls(expected=mean(samples),deviation=pstdev(samples))
+
+
+class Schedule:
+    """
+    Earliest start , latest finish and slack of every node of the graph
+
+    durations : node name -> duration of the node , node without duration take no time
+    risk : number of deviation added to the expected duration
+    """
+
+    def __init__(self,graph:LineageGraph,\
+                 durations:Dict[str,Union[float,Duration]],\
+                 risk:float=0.0)->None:
+
+        self._graph = graph
+
+        self._risk = risk
+
+        self._durations:Dict[str,float] = {x:self._to_value(y) for x,y in durations.items()}
+
+        self._earliest_start:Dict[str,float] = dict()
+
+        self._earliest_finish:Dict[str,float] = dict()
+
+        self._latest_start:Dict[str,float] = dict()
+
+        self._latest_finish:Dict[str,float] = dict()
+
+        self.end:float = 0.0
+
+        self._compute()
+
+    def get_duration(self,node_name:str)->float:
+        return self._durations.get(node_name,0.0)
+
+    def get_earliest_start(self,node_name:str)->float:
+        return self._earliest_start[node_name]
+
+    def get_earliest_finish(self,node_name:str)->float:
+        return self._earliest_finish[node_name]
+
+    def get_latest_start(self,node_name:str)->float:
+        return self._latest_start[node_name]
+
+    def get_latest_finish(self,node_name:str)->float:
+        return self._latest_finish[node_name]
+
+    def get_slack(self,node_name:str)->float:
+        """
+        How long the node can be delayed without delaying the end
+        """
+        return self._latest_start[node_name]-self._earliest_start[node_name]
+
+    def is_critical(self,node_name:str)->bool:
+        return self.get_slack(node_name=node_name)<=SLACK_TOLERANCE
+
+    def get_delay_impact(self,node_name:str,delay:float)->float:
+        """
+        Return how much the end is delayed when the node is delayed
+        """
+        return max(0.0,delay-self.get_slack(node_name=node_name))
+
+    def get_critical_path(self)->List[str]:
+        """
+        Return the critical path which finish at the end
+        """
+
+        critical_path:List[str] = list()
+
+        node_name = None
+
+        # start from the last critical node and walk back through critical parents
+
+        for x in reversed(self._order):
+            if self.is_critical(node_name=x) and\
+                abs(self._earliest_finish[x]-self.end)<=SLACK_TOLERANCE:
+                node_name = x
+                break
+
+        while node_name is not None:
+
+            critical_path.append(node_name)
+
+            start = self._earliest_start[node_name]
+
+            node_name = None
+
+            for parent_node in self._get_parents(critical_path[-1]):
+                if self.is_critical(node_name=parent_node) and\
+                    abs(self._earliest_finish[parent_node]-start)<=SLACK_TOLERANCE:
+                    node_name = parent_node
+                    break
+
+        critical_path.reverse()
+
+        return critical_path
+
+    def set_duration(self,node_name:str,duration:Union[float,Duration])->None:
+        """
+        Change the duration of the node and only recompute the node which are affected
+        """
+
+        self._durations[node_name] = self._to_value(duration)
+
+        if self._version!=self._graph._version or node_name not in self._positions:
+            self._compute()
+            return
+
+        self._forward(node_name=node_name)
+
+        end = max(self._earliest_finish.values(),default=0.0)
+
+        # every latest finish depend on the end
+
+        if end!=self.end:
+            self.end = end
+            self._backward_all()
+            return
+
+        self._backward(node_name=node_name)
+
+    def _to_value(self,duration:Union[float,Duration])->float:
+
+        if isinstance(duration,Duration):
+            return duration.expected+self._risk*duration.deviation
+
+        return float(duration)
+
+    def _get_parents(self,node_name:str)->List[str]:
+        return [x for x in self._graph._parents[node_name] if x in self._graph._parents]
+
+    def _compute(self)->None:
+
+        topological_order = self._graph.get_topological_order()
+
+        if not topological_order.is_acyclic():
+            raise ValueError("schedule cannot be computed for graph with cycle")
+
+        self._version = topological_order.version
+
+        self._order:List[str] = topological_order.get_order()
+
+        self._positions:Dict[str,int] = {x:index for index,x in enumerate(self._order)}
+
+        self._earliest_start.clear()
+
+        self._earliest_finish.clear()
+
+        for node_name in self._order:
+            self._update_earliest(node_name=node_name)
+
+        self.end = max(self._earliest_finish.values(),default=0.0)
+
+        self._backward_all()
+
+    def _backward_all(self)->None:
+
+        self._latest_start.clear()
+
+        self._latest_finish.clear()
+
+        for node_name in reversed(self._order):
+            self._update_latest(node_name=node_name)
+
+    def _update_earliest(self,node_name:str)->bool:
+        """
+        Return whether the earliest finish has changed
+        """
+
+        earliest_start = max([self._earliest_finish[x] for x in self._get_parents(node_name)],default=0.0)
+
+        earliest_finish = earliest_start+self.get_duration(node_name=node_name)
+
+        is_changed = self._earliest_finish.get(node_name)!=earliest_finish
+
+        self._earliest_start[node_name] = earliest_start
+
+        self._earliest_finish[node_name] = earliest_finish
+
+        return is_changed
+
+    def _update_latest(self,node_name:str)->bool:
+        """
+        Return whether the latest start has changed
+        """
+
+        latest_finish = min([self._latest_start[x] for x in self._graph._children.get(node_name,())],\
+                            default=self.end)
+
+        latest_start = latest_finish-self.get_duration(node_name=node_name)
+
+        is_changed = self._latest_start.get(node_name)!=latest_start
+
+        self._latest_finish[node_name] = latest_finish
+
+        self._latest_start[node_name] = latest_start
+
+        return is_changed
+
+    def _forward(self,node_name:str)->None:
+        """
+        Update the earliest time of the node and its descendants in topological order
+        """
+
+        queue:List[int] = [self._positions[node_name]]
+
+        queued = {node_name}
+
+        while len(queue)>0:
+
+            current_node = self._order[heapq.heappop(queue)]
+
+            if not self._update_earliest(node_name=current_node):
+                continue
+
+            for child_node in self._graph._children.get(current_node,()):
+                if child_node not in queued:
+                    queued.add(child_node)
+                    heapq.heappush(queue,self._positions[child_node])
+
+    def _backward(self,node_name:str)->None:
+        """
+        Update the latest time of the node and its ancestors in reverse topological order
+        """
+
+        queue:List[int] = [-self._positions[node_name]]
+
+        queued = {node_name}
+
+        while len(queue)>0:
+
+            current_node = self._order[-heapq.heappop(queue)]
+
+            if not self._update_latest(node_name=current_node):
+                continue
+
+            for parent_node in self._get_parents(current_node):
+                if parent_node not in queued:
+                    queued.add(parent_node)
+                    heapq.heappush(queue,-self._positions[parent_node])
+
+
+def get_schedule(graph:LineageGraph,\
+                 durations:Dict[str,Union[float,Duration]],\
+                 risk:float=0.0)->Optional[Schedule]:
+    """
+    Return None when the graph has cycle
+    """
+
+    if not graph.get_topological_order().is_acyclic():
+        return None
+
+    return Schedule(graph=graph,durations=durations,risk=risk)
@@ -3,13 +3,29 @@ from core import identify_component_value,ComponentValueType
 from core import parse_database_component_value,DBComponentValue,UndefinedComponentValue
 from core import parse_blob_component_value,BlobComponentValue
 from core import parse_loader_component,parse_caller_component,parse_transformer_component
+from core import parse_component,LoaderComponent,CallerComponent,ComponentCache,LocationType
+from core import UNDEFINED_COMPONENT_VALUE
 from graph import remove_node,Edge,edge_to_dict,merge_edge,merge_edges,replace_nodes
 from graph import get_disjointed_nodes,get_last_nodes,get_first_nodes,join_to_node
-from graph import replace_node_parents,replace_node_with_edge
+from graph import replace_node_parents,replace_node_with_edge,LineageGraph,contract_nodes
+from graph import FrozenLineageGraph,FrozenEdge,classify_nodes,MAX_LAYER_DEPTH
+from graph import get_strongly_connected_components,_get_closure
 from vih import get_vih,get_vih_statement
-from vih import VIH,vih_to_edge,vihs_to_edges
+from vih import VIH,vih_to_edge,vihs_to_edges,iter_vih_statements,iter_vih
+from vih import scan_vih,VIHError
+from schedule import Duration,get_schedule
+from csr import CompactGraph
+from dense import DenseReachability,HAS_NUMPY,_get_packed_closure
+from columnar import parse_components_batch,ErrorCode,COMPONENT_TYPE_CODES,NULL_CODE
+from catalog import TableCatalog
+from scan import scan_sql_directory,get_procedure_name
+from cache import VIHCache,CachedVIH,get_content_hash
 
 from typing import List
+import io
+import os
+import sqlite3
+import tempfile
 
 def test_value_identify_component():
     assert identify_component("load:")==ComponentType.loader
@@ -1057,6 +1073,692 @@ def test_value_vihs_to_edges():
     assert len(edges_to_dict["D"])==1
     assert "C" in edges_to_dict["D"]
 
+def test_remove_node_lineage_graph():
+
+    # A -> B -> C -> D
+    #             -> E
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="A",parent_nodes=[]))
+    edges.append(Edge(node_name="B",parent_nodes=["A"]))
+    edges.append(Edge(node_name="C",parent_nodes=["B"]))
+    edges.append(Edge(node_name="D",parent_nodes=["C"]))
+    edges.append(Edge(node_name="E",parent_nodes=["C"]))
+
+    graph = LineageGraph.from_edges(edges=edges)
+
+    # A -> B -> D
+    #        -> E
+
+    assert graph.remove_node(node_name="C")
+    assert not graph.remove_node(node_name="C")
+
+    new_dicts = edge_to_dict(edges=graph.to_edges())
+
+    assert len(graph)==4
+    assert new_dicts["B"]==["A"]
+    assert new_dicts["D"]==["B"]
+    assert new_dicts["E"]==["B"]
+    assert graph.get_children(node_name="B")==["D","E"]
+    assert not graph.is_node_parent(node_name="D")
+
+    # the original edges are not modified
+
+    assert edges[3].parent_nodes==["C"]
+
+def test_same_result_lineage_graph():
+
+    # org 
+    # A -> B -> G
+
+    # replace edge
+    # C -> D
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="A",parent_nodes=[]))
+    edges.append(Edge(node_name="B",parent_nodes=["A"]))
+    edges.append(Edge(node_name="G",parent_nodes=["B"]))
+
+    replace_edges:List[Edge] = list()
+
+    replace_edges.append(Edge(node_name="C",parent_nodes=[]))
+    replace_edges.append(Edge(node_name="D",parent_nodes=["C"]))
+
+    graph = LineageGraph.from_edges(edges=edges)
+
+    assert graph.replace_node_with_edge(node_name="B",replace_edges=replace_edges)
+
+    expected = replace_node_with_edge(node_name="B",\
+                                      replace_edges=replace_edges,\
+                                      edges=edges)
+    
+    assert edge_to_dict(graph.to_edges())==edge_to_dict(expected)
+    assert [x.node_name for x in graph.to_edges()]==[x.node_name for x in expected]
+
+
+def test_value_contract_nodes():
+
+    # A -> B -> C -> E
+    #   -> D ------>
+
+    # remove B,C,D
+
+    # A -> E
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="E",parent_nodes=["C","D"]))
+    edges.append(Edge(node_name="C",parent_nodes=["B"]))
+    edges.append(Edge(node_name="A",parent_nodes=[]))
+    edges.append(Edge(node_name="B",parent_nodes=["A"]))
+    edges.append(Edge(node_name="D",parent_nodes=["A"]))
+
+    contract_edges = contract_nodes(node_names={"B","C","D"},edges=edges)
+
+    contract_edges_dict = edge_to_dict(edges=contract_edges)
+
+    assert len(contract_edges)==2
+    assert contract_edges_dict["A"]==[]
+    assert contract_edges_dict["E"]==["A"]
+
+def test_multi_graph_merge_edges():
+
+    # first
+    # B -> A
+
+    # second
+    # C -> A
+    # B -> D
+
+    # third
+    # B,E -> A
+
+    # merge
+    # B,C,E -> A
+    # B -> D
+
+    graphs:List[List[Edge]] = list()
+
+    graphs.append([Edge(node_name="A",parent_nodes=["B"])])
+
+    graphs.append([Edge(node_name="D",parent_nodes=["B"]),\
+                   Edge(node_name="A",parent_nodes=["C"])])
+    
+    graphs.append([Edge(node_name="A",parent_nodes=["B","E"])])
+
+    merged = merge_edges(graphs=graphs)
+
+    assert [x.node_name for x in merged]==["A","D"]
+    assert merged[0].parent_nodes==["B","C","E"]
+    assert merged[1].parent_nodes==["B"]
+
+def test_value_frozen_lineage_graph():
+
+    # A -> B -> C
+    # D -> E
+
+    edges:List[FrozenEdge] = list()
+
+    edges.append(FrozenEdge(node_name="A",parent_nodes=()))
+    edges.append(FrozenEdge(node_name="B",parent_nodes=("A",)))
+    edges.append(FrozenEdge(node_name="C",parent_nodes=("B",)))
+    edges.append(FrozenEdge(node_name="D",parent_nodes=()))
+    edges.append(FrozenEdge(node_name="E",parent_nodes=("D",)))
+
+    graph = FrozenLineageGraph.from_edges(edges=edges)
+
+    # A -> C
+    # D -> E
+
+    new_graph = graph.remove_node(node_name="B")
+
+    assert graph.remove_node(node_name="F") is None
+    assert new_graph.get_node(node_name="C")==FrozenEdge(node_name="C",parent_nodes=("A",))
+    assert len(new_graph)==4
+
+    # the original graph is not changed
+
+    assert graph.get_node(node_name="C")==FrozenEdge(node_name="C",parent_nodes=("B",))
+    assert graph.to_frozen_edges()==edges
+
+    # the unchanged node is shared with the original graph
+
+    assert new_graph._graph._parents["E"] is graph._graph._parents["E"]
+
+def test_value_derive_frozen_lineage_graph():
+
+    # N0 -> N1 -> ... -> N99
+
+    edges = [Edge(node_name="N"+str(x),parent_nodes=["N"+str(x-1)] if x>0 else []) for x in range(100)]
+
+    graph = FrozenLineageGraph.from_edges(edges=edges)
+
+    parents = list(graph._graph._parents.items())
+
+    children = list(graph._graph._children.items())
+
+    # chain of edit which is longer than MAX_LAYER_DEPTH
+
+    new_graph = graph
+
+    for index in range(1,MAX_LAYER_DEPTH*2):
+        new_graph = new_graph.merge_edge(edges=[Edge(node_name="N"+str(index),parent_nodes=["X"])])
+
+    # the original graph is not changed
+
+    assert list(graph._graph._parents.items())==parents
+    assert list(graph._graph._children.items())==children
+    assert graph.get_children(node_name="X")==()
+
+    assert new_graph.get_parents(node_name="N1")==("N0","X")
+    assert len(new_graph.get_children(node_name="X"))==MAX_LAYER_DEPTH*2-1
+    assert new_graph._graph._parents.depth<=MAX_LAYER_DEPTH
+
+    # only the edited node is stored by the derived graph , the other node is shared
+
+    edited_graph = graph.merge_edge(edges=[Edge(node_name="N50",parent_nodes=["X"])])
+
+    assert list(edited_graph._graph._parents._layer)==["N50"]
+    assert list(edited_graph._graph._children._layer)==["X"]
+    assert edited_graph._graph._parents["N51"] is graph._graph._parents["N51"]
+    assert edited_graph._graph._children["N51"] is graph._graph._children["N51"]
+    assert [x.node_name for x in edited_graph.to_frozen_edges()]==["N"+str(x) for x in range(100)]
+
+def test_value_classify_nodes():
+
+    # A -> B -> C
+    #   -> D
+    # E
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="A",parent_nodes=[]))
+    edges.append(Edge(node_name="B",parent_nodes=["A"]))
+    edges.append(Edge(node_name="C",parent_nodes=["B"]))
+    edges.append(Edge(node_name="D",parent_nodes=["A"]))
+    edges.append(Edge(node_name="E",parent_nodes=[]))
+
+    (first_nodes,last_nodes,disjointed_nodes) = classify_nodes(edges=edges)
+
+    assert [x.node_name for x in first_nodes]==["A"]
+    assert [x.node_name for x in last_nodes]==["C","D"]
+    assert [x.node_name for x in disjointed_nodes]==["E"]
+
+def test_value_get_ancestors_lineage_graph():
+
+    # A -> B -> D -> E
+    #   -> C ->
+    # F
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="A",parent_nodes=[]))
+    edges.append(Edge(node_name="B",parent_nodes=["A"]))
+    edges.append(Edge(node_name="C",parent_nodes=["A"]))
+    edges.append(Edge(node_name="D",parent_nodes=["B","C"]))
+    edges.append(Edge(node_name="E",parent_nodes=["D"]))
+    edges.append(Edge(node_name="F",parent_nodes=[]))
+
+    graph = LineageGraph.from_edges(edges=edges)
+
+    assert graph.get_ancestors(node_name="E")==["A","B","C","D"]
+    assert graph.get_descendants(node_name="B")==["D","E"]
+    assert graph.get_ancestors(node_name="F")==[]
+    assert graph.get_reachability_index().is_ancestor(ancestor_node_name="A",node_name="E")
+    assert not graph.get_reachability_index().is_ancestor(ancestor_node_name="E",node_name="A")
+
+    # the index is rebuild after the graph has changed
+
+    graph.remove_node(node_name="D")
+
+    assert graph.get_ancestors(node_name="E")==["A","B","C"]
+
+def test_cycle_get_ancestors_lineage_graph():
+
+    # A -> B <--> C -> D
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="A",parent_nodes=[]))
+    edges.append(Edge(node_name="B",parent_nodes=["A","C"]))
+    edges.append(Edge(node_name="C",parent_nodes=["B"]))
+    edges.append(Edge(node_name="D",parent_nodes=["C"]))
+
+    graph = LineageGraph.from_edges(edges=edges)
+
+    assert graph.get_ancestors(node_name="C")==["A","B","C"]
+    assert graph.get_descendants(node_name="A")==["B","C","D"]
+
+def test_value_get_topological_order():
+
+    # A -> B -> D
+    #   -> C ->
+    # E
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="D",parent_nodes=["B","C"]))
+    edges.append(Edge(node_name="B",parent_nodes=["A"]))
+    edges.append(Edge(node_name="C",parent_nodes=["A"]))
+    edges.append(Edge(node_name="A",parent_nodes=[]))
+    edges.append(Edge(node_name="E",parent_nodes=[]))
+
+    graph = LineageGraph.from_edges(edges=edges)
+
+    topological_order = graph.get_topological_order()
+
+    assert topological_order.is_acyclic()
+    assert topological_order.levels==[["A","E"],["B","C"],["D"]]
+    assert topological_order.node_levels["D"]==2
+    assert topological_order.get_order()==["A","E","B","C","D"]
+
+    # the order is cached until the graph has changed
+
+    assert graph.get_topological_order() is topological_order
+
+    graph.remove_node(node_name="B")
+
+    assert graph.get_topological_order().levels==[["A","E"],["C"],["D"]]
+
+def test_cycle_get_topological_order():
+
+    # A -> B <--> C -> D
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="A",parent_nodes=[]))
+    edges.append(Edge(node_name="B",parent_nodes=["A","C"]))
+    edges.append(Edge(node_name="C",parent_nodes=["B"]))
+    edges.append(Edge(node_name="D",parent_nodes=["C"]))
+
+    topological_order = LineageGraph.from_edges(edges=edges).get_topological_order()
+
+    assert not topological_order.is_acyclic()
+    assert topological_order.cycles==[["B","C"]]
+    assert topological_order.levels==[["A"],["B","C"],["D"]]
+
+def test_value_get_schedule():
+
+    # A(10) -> B(30) -> D(5)
+    #       -> C(10) ->
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="A",parent_nodes=[]))
+    edges.append(Edge(node_name="B",parent_nodes=["A"]))
+    edges.append(Edge(node_name="C",parent_nodes=["A"]))
+    edges.append(Edge(node_name="D",parent_nodes=["B","C"]))
+
+    durations = {
+        "A":10,
+        "B":30,
+        "C":Duration.from_samples([5,15]),
+        "D":5
+    }
+
+    schedule = get_schedule(graph=LineageGraph.from_edges(edges=edges),\
+                            durations=durations)
+
+    assert schedule.end==45
+    assert schedule.get_critical_path()==["A","B","D"]
+    assert schedule.get_earliest_start(node_name="D")==40
+    assert schedule.get_slack(node_name="C")==20
+    assert schedule.get_delay_impact(node_name="C",delay=25)==5
+    assert schedule.get_delay_impact(node_name="B",delay=10)==10
+
+    # C become the critical path
+
+    schedule.set_duration(node_name="C",duration=50)
+
+    assert schedule.end==65
+    assert schedule.get_critical_path()==["A","C","D"]
+    assert schedule.get_slack(node_name="B")==20
+    assert schedule.get_latest_start(node_name="A")==0
+
+def test_cycle_get_schedule():
+
+    # A <--> B
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="A",parent_nodes=["B"]))
+    edges.append(Edge(node_name="B",parent_nodes=["A"]))
+
+    assert get_schedule(graph=LineageGraph.from_edges(edges=edges),durations={}) is None
+
+def test_value_compact_graph():
+
+    # X -> A -> B -> D
+    #        -> C ->
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="A",parent_nodes=["X"]))
+    edges.append(Edge(node_name="B",parent_nodes=["A"]))
+    edges.append(Edge(node_name="C",parent_nodes=["A"]))
+    edges.append(Edge(node_name="D",parent_nodes=["B","C"]))
+
+    graph = CompactGraph.from_edges(edges=edges)
+
+    assert len(graph)==4
+    assert graph.get_edge_count()==5
+    assert "X" not in graph
+    assert graph.get_parents(node_name="D")==["B","C"]
+    assert graph.get_children(node_name="A")==["B","C"]
+    assert graph.get_children(node_name="X")==["A"]
+    assert sorted(graph.get_ancestors(node_name="D"))==["A","B","C","X"]
+    assert sorted(graph.get_descendants(node_name="B"))==["D"]
+    assert edge_to_dict(graph.to_edges())==edge_to_dict(edges)
+
+def test_value_dense_reachability():
+
+    # H1 -> T1 -> T3
+    # H2 -> T2 ->
+    # H1 -> T2
+    # T4 <--> T5
+
+    edges:List[Edge] = list()
+
+    edges.append(Edge(node_name="H1",parent_nodes=[]))
+    edges.append(Edge(node_name="H2",parent_nodes=[]))
+    edges.append(Edge(node_name="T1",parent_nodes=["H1"]))
+    edges.append(Edge(node_name="T2",parent_nodes=["H1","H2"]))
+    edges.append(Edge(node_name="T3",parent_nodes=["T1","T2"]))
+    edges.append(Edge(node_name="T4",parent_nodes=["T5"]))
+    edges.append(Edge(node_name="T5",parent_nodes=["T4"]))
+
+    graph = CompactGraph.from_edges(edges=edges)
+
+    # numpy is used when it is installed
+
+    for use_numpy in [True,False]:
+
+        reachability = DenseReachability(graph=graph,use_numpy=use_numpy)
+
+        descendants = reachability.count_descendants()
+
+        ancestors = reachability.count_ancestors()
+
+        assert descendants["H1"]==3
+        assert descendants["H2"]==2
+        assert descendants["T3"]==0
+        assert descendants["T4"]==2
+        assert ancestors["T3"]==4
+        assert ancestors["T5"]==2
+        assert reachability.is_reachable(node_name="H2",descendant_node_name="T3")
+        assert not reachability.is_reachable(node_name="T3",descendant_node_name="H2")
+
+    # subgraph
+
+    reachability = DenseReachability(graph=graph,node_names=["H1","T1","T3"])
+
+    assert reachability.count_descendants()=={"H1":2,"T1":1,"T3":0}
+
+def test_value_packed_closure():
+
+    if not HAS_NUMPY:
+        return
+
+    # 130 node so that the row use 3 words , node x flow into x+1 and x+64 and the last 10 node are the cycle
+
+    node_count = 130
+
+    successors:List[List[int]] = [[y for y in [x+1,x+64] if y<node_count] for x in range(node_count)]
+
+    successors[node_count-1].append(node_count-10)
+
+    closures = _get_closure(components=get_strongly_connected_components(successors=successors),successors=successors)
+
+    packed_closures = _get_packed_closure(successors=successors)
+
+    assert packed_closures.shape==(node_count,3)
+    assert [sum([int(y)<<(64*index) for index,y in enumerate(x)]) for x in packed_closures]==list(closures)
+
+def test_value_parse_component():
+
+    (component_type,component) = parse_component(" load:source:db:prime:foo[a.b]| target:ud: ")
+
+    assert component_type==ComponentType.loader
+    assert isinstance(component,LoaderComponent)
+    assert component.source.tag=="foo"
+    assert component.source.tables==("a.b",)
+    assert component.target_component_value_type==ComponentValueType.undefined
+
+    (component_type,component) = parse_component("call:pipeline|foo/world")
+
+    assert component_type==ComponentType.caller
+    assert component==CallerComponent(caller_type="pipeline",caller_value="foo/world")
+
+def test_null_parse_component():
+
+    assert parse_component("foo:bar")==(None,None)
+
+    # the component is identified but the value is not valid
+
+    assert parse_component("transform:blob:foo")==(ComponentType.transformer,None)
+
+def test_value_component_cache():
+
+    cache = ComponentCache(max_size=2)
+
+    value = "load:source:db:prime:foo[a.b]|target:ud:"
+
+    first = cache.parse_component(value)
+
+    assert cache.parse_component(value) is first
+    assert cache.identify_component(value)==ComponentType.loader
+    assert cache.hits==2
+    assert cache.misses==1
+
+    cache.parse_component("call:pipeline|foo/world")
+    cache.parse_component("transform:ud:")
+
+    # the least recently used value has been removed
+
+    assert len(cache)==2
+    assert cache.parse_component(value) is not first
+    assert cache.misses==4
+
+def test_value_parse_components_batch():
+
+    values = [
+        "load:source:ud:|target:db:prime:host.db[s.a,s.b]",
+        "load:source:db:cloud:foo[s.c]|target:db:prime:host.db[s.b]",
+        "load:source:ud:|target:db:prime:other[s.d]",
+        "transform:db:prime:host.db[s.proc]",
+        "call:pipeline|foo/world",
+        "set:variable",
+        "transform:blob:foo"
+    ]
+
+    columns = parse_components_batch(values=values)
+
+    assert len(columns)==7
+    assert columns.component_types[0]==COMPONENT_TYPE_CODES[ComponentType.loader]
+    assert columns.component_types[5]==NULL_CODE
+    assert list(columns.error_codes)==[ErrorCode.none]*5+[ErrorCode.not_component,ErrorCode.invalid_component]
+    assert columns.tags==["host.db","foo","other"]
+    assert columns.get_target_tables(row=0)==["s.a","s.b"]
+    assert columns.get_source_tables(row=1)==["s.c"]
+    assert columns.get_source_tables(row=3)==["s.proc"]
+    assert columns.get_target_tables(row=4)==[]
+    assert columns.count_tags(component_type=ComponentType.loader,location=LocationType.prime)=={"host.db":2,"other":1}
+
+def test_value_slotted_component():
+
+    first = parse_loader_component("load:source:ud:|target:db:cloud:foo[a.b]")
+
+    second = parse_transformer_component("transform:ud:")
+
+    # every undefined value is the same object
+
+    assert first.source is UNDEFINED_COMPONENT_VALUE
+    assert second.source is UNDEFINED_COMPONENT_VALUE
+    assert not hasattr(first,"__dict__")
+
+    try:
+        first.target.tables = ("c.d",)
+        assert False
+    except AttributeError:
+        pass
+
+def test_value_table_catalog():
+
+    catalog = TableCatalog()
+
+    catalog.add_component("/pl_sales","actv_load_order",\
+                          parse_loader_component("load:source:db:prime:Host.DB[Sales.Order]|target:db:cloud:lake.db[raw.order]"))
+    
+    catalog.add_component("/pl_sales","actv_load_customer",\
+                          parse_loader_component("load:source:db:prime:host.db[sales.customer]|target:db:cloud:lake.db[raw.customer]"))
+    
+    vihs = get_vih(vih_statement="source:raw.order,raw.customer|target:[mart].[sales]|;")
+
+    catalog.add_component("/pl_sales","actv_transform",\
+                          parse_transformer_component("transform:db:cloud:lake.db[mart.usp_sales]"),\
+                          vihs=vihs)
+    
+    # the same activity name in the other pipeline is the other component
+
+    catalog.add_component("foo/pl_customer","actv_load_order",\
+                          parse_loader_component("load:source:db:prime:host.db[sales.customer]|target:db:cloud:lake.db[raw.customer_copy]"))
+
+    assert len(catalog)==6
+    assert catalog.get_readers("host.db.sales.order")==[("/pl_sales","actv_load_order")]
+    assert catalog.get_readers("HOST.db.sales.*")==[("/pl_sales","actv_load_customer"),\
+                                                    ("foo/pl_customer","actv_load_order"),\
+                                                    ("/pl_sales","actv_load_order")]
+    assert catalog.get_writers("lake.db.raw.order")==[("/pl_sales","actv_load_order")]
+    assert catalog.get_writers("lake.db.raw.customer_copy")==[("foo/pl_customer","actv_load_order")]
+    assert catalog.get_readers("lake.db.raw.*")==[("/pl_sales","actv_transform")]
+    assert catalog.get_writers("lake.db.mart.sales")==[("/pl_sales","actv_transform")]
+    assert [x.name for x in catalog.find_tables("lake.db.*")]==["lake.db.mart.sales","lake.db.raw.customer",\
+                                                                 "lake.db.raw.customer_copy","lake.db.raw.order"]
+    assert catalog.find_tables("lake.db.raw.order")[0].location==LocationType.cloud
+    assert catalog.find_tables("foo.*")==[]
+
+def test_value_iter_vih_statements():
+
+    value = "hello<vih>source:a|target:b|;</vih> world <vih>source: c|target:d|;</vih>".encode("utf-8")
+
+    # the second block straddle the chunk
+
+    statements = list(iter_vih_statements(io.BytesIO(value),chunk_size=7))
+
+    assert statements==[(5,"source:a|target:b|;"),(42,"source:c|target:d|;")]
+
+    vihs = list(iter_vih(io.BytesIO(value+b"<vih>source:a</vih>"),chunk_size=3))
+
+    assert len(vihs)==3
+    assert vihs[1][1][0].source==("c",)
+    assert vihs[2][1] is None
+
+def test_shared_table_vihs_to_edges():
+
+    vihs = get_vih(vih_statement="source:a,b|target:stg|;source:c,a|target:stg|;source:stg|target:d,stg2|;source:stg2,b|target:d|;")
+
+    edges = vihs_to_edges(vihs=vihs)
+
+    assert [x.node_name for x in edges]==["a","b","stg","c","d","stg2"]
+    assert edge_to_dict(edges=edges)["stg"]==["a","b","c"]
+    assert edge_to_dict(edges=edges)["d"]==["stg","stg2","b"]
+    assert edge_to_dict(edges=edges)["c"]==[]
+
+def test_value_scan_sql_directory():
+
+    assert get_procedure_name("CREATE OR ALTER PROCEDURE [mart].[usp_sales] AS","x")=="mart.usp_sales"
+    assert get_procedure_name("create proc usp_order as","x")=="dbo.usp_order"
+    assert get_procedure_name("select 1","x")=="x"
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        os.mkdir(os.path.join(directory,"mart"))
+
+        with open(os.path.join(directory,"mart","usp_sales.sql"),"w") as file:
+            file.write("/*<vih>source:raw.order|target:stg.sales|;</vih>*/\n"+\
+                       "create procedure mart.usp_sales as\n"+\
+                       "/*<vih>source:stg.sales|target:mart.sales|;</vih>*/")
+
+        with open(os.path.join(directory,"usp_invalid.sql"),"w") as file:
+            file.write("create procedure dbo.usp_invalid as /*<vih>source:a</vih>*/")
+
+        with open(os.path.join(directory,"usp_none.sql"),"w") as file:
+            file.write("create procedure dbo.usp_none as select 1")
+
+        for max_workers in [1,2]:
+
+            procedures = scan_sql_directory(directory=directory,max_workers=max_workers,chunk_size=1)
+
+            assert list(procedures)==["mart.usp_sales","dbo.usp_invalid"]
+            assert procedures["dbo.usp_invalid"] is None
+            assert edge_to_dict(edges=procedures["mart.usp_sales"])=={"raw.order":[],\
+                                                                       "stg.sales":["raw.order"],\
+                                                                       "mart.sales":["stg.sales"]}
+
+def test_value_vih_cache():
+
+    vihs = get_vih(vih_statement="source:a,b|target:c|;source:c|target:|;")
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        cache_path = os.path.join(directory,"vih.db")
+
+        with VIHCache(path=cache_path) as cache:
+            cache.put_many([(get_content_hash(b"valid"),CachedVIH(procedure_name="dbo.usp_valid",vihs=vihs)),\
+                            (get_content_hash(b"invalid"),CachedVIH(procedure_name=None,vihs=None))])
+
+        with VIHCache(path=cache_path) as cache:
+
+            assert len(cache)==2
+            assert cache.get(get_content_hash(b"valid"))==CachedVIH(procedure_name="dbo.usp_valid",vihs=vihs)
+            assert cache.get(get_content_hash(b"invalid"))==CachedVIH(procedure_name=None,vihs=None)
+            assert cache.get(get_content_hash(b"missing")) is None
+            assert (cache.hits,cache.misses)==(2,1)
+
+        # the vih of the older parser is parsed again
+
+        with VIHCache(path=cache_path,parser_version=0) as cache:
+            assert cache.get(get_content_hash(b"valid")) is None
+
+        with open(os.path.join(directory,"usp_sales.sql"),"w") as file:
+            file.write("create procedure mart.usp_sales as /*<vih>source:a|target:b|;</vih>*/")
+
+        procedures = scan_sql_directory(directory=directory,max_workers=2,cache_path=cache_path)
+
+        assert edge_to_dict(edges=procedures["mart.usp_sales"])=={"a":[],"b":["a"]}
+
+        with VIHCache(path=cache_path) as cache:
+            assert len(cache)==3
+            assert cache.get(get_content_hash(b"create procedure mart.usp_sales as /*<vih>source:a|target:b|;</vih>*/")).procedure_name=="mart.usp_sales"
+
+        assert scan_sql_directory(directory=directory,max_workers=1,cache_path=cache_path)==procedures
+
+        # the connection is closed when the cache is closed
+
+        try:
+            cache._connection.execute("select 1")
+            assert False
+        except sqlite3.ProgrammingError:
+            pass
+
+def test_value_scan_vih():
+
+    (vih,error) = scan_vih(vih_statement="source:a, b|target:c|;\n source :d|target: |;\n")
+
+    assert error is None
+    assert vih==[VIH(order=1,source=("a","b"),target=("c",)),VIH(order=2,source=("d",),target=())]
+
+    # the stray character is skipped as the statement
+    assert scan_vih(vih_statement="source:a|target:b|;x")==([VIH(order=1,source=("a",),target=("b",))],None)
+
+def test_null_scan_vih():
+
+    assert scan_vih(vih_statement="source:a|target:b|;source:a|targt:b|;")==(None,VIHError(position=28,message="expected target"))
+    assert scan_vih(vih_statement="source:a|target:b")==(None,VIHError(position=17,message="expected |"))
+    assert scan_vih(vih_statement="source:a|target:b|x")==(None,VIHError(position=18,message="expected ;"))
+    assert scan_vih(vih_statement="source=a|")==(None,VIHError(position=6,message="expected :"))
 
 
 def main():
@@ -1090,6 +1792,34 @@ def main():
     test_value_get_vih()
     test_value_vih_to_edge()
     test_value_vihs_to_edges()
+    test_remove_node_lineage_graph()
+    test_same_result_lineage_graph()
+    test_value_contract_nodes()
+    test_multi_graph_merge_edges()
+    test_value_frozen_lineage_graph()
+    test_value_derive_frozen_lineage_graph()
+    test_value_classify_nodes()
+    test_value_get_ancestors_lineage_graph()
+    test_cycle_get_ancestors_lineage_graph()
+    test_value_get_topological_order()
+    test_cycle_get_topological_order()
+    test_value_get_schedule()
+    test_cycle_get_schedule()
+    test_value_compact_graph()
+    test_value_dense_reachability()
+    test_value_packed_closure()
+    test_value_parse_component()
+    test_null_parse_component()
+    test_value_component_cache()
+    test_value_parse_components_batch()
+    test_value_slotted_component()
+    test_value_table_catalog()
+    test_value_iter_vih_statements()
+    test_shared_table_vihs_to_edges()
+    test_value_scan_sql_directory()
+    test_value_vih_cache()
+    test_value_scan_vih()
+    test_null_scan_vih()
 
 if __name__=="__main__":
     main()
\ No newline at end of file
@@ -1,6 +1,7 @@
-from typing import List,Optional
+import os
+from typing import List,Optional,Tuple,Iterator,Union,BinaryIO
 from dataclasses import dataclass
-from graph import Edge,merge_edges
+from graph import Edge,merge_node_parents
 
 START_BLOCK = "<vih>"
 END_BLOCK = "</vih>"
@@ -10,11 +11,21 @@ BLOCK_DELIMINATOR = "|"
 STATEMENT_DELIMINATOR = ";"
 VALUE_DELIMINATOR = ","
 
-@dataclass
+DEFAULT_CHUNK_SIZE = 1024*1024
+
+# increase when the grammar or the parsed vih change so that the cached vih is parsed again
+
+PARSER_VERSION = 3
+
+SOURCE_PREFIX = SOURCE_BLOCK+":"
+
+TARGET_PREFIX = TARGET_BLOCK+":"
+
+@dataclass(frozen=True,slots=True)
 class VIH:
     order:int
-    source:List[str]
-    target:List[str]
+    source:Tuple[str,...]
+    target:Tuple[str,...]
 
 def is_contain_vih(text:str)->bool:
     return START_BLOCK in text and END_BLOCK in text
@@ -29,39 +40,251 @@ def get_vih_statement(text:str)->str:
 
     return text[start:end].replace(" ","")
 
+def iter_vih_statements(source:Union[str,os.PathLike,BinaryIO],\
+                        chunk_size:int=DEFAULT_CHUNK_SIZE,\
+                        encoding:str="utf-8")->Iterator[Tuple[int,str]]:
+    """
+    Read the file in chunks and yield every vih statement
+    Return (byte offset of the start block,vih statement)
+
+    source : path of the file or binary file object
+    The memory only depends on the chunk size and the largest vih block
+    """
+
+    if isinstance(source,(str,os.PathLike)):
+        with open(source,"rb") as file:
+            yield from iter_vih_statements(source=file,chunk_size=chunk_size,encoding=encoding)
+        return
+
+    start_block = START_BLOCK.encode(encoding)
+
+    end_block = END_BLOCK.encode(encoding)
+
+    buffer = bytearray()
+
+    # offset of the first byte of the buffer in the file
+
+    buffer_offset = 0
+
+    # position of the start block in the buffer when the end block has not been read yet
+
+    block_start = -1
+
+    search_from = 0
+
+    while True:
+
+        chunk = source.read(chunk_size)
+
+        buffer.extend(chunk)
+
+        while True:
+
+            if block_start<0:
+
+                block_start = buffer.find(start_block,search_from)
+
+                if block_start<0:
+                    # the start block may straddle the chunk
+                    search_from = max(0,len(buffer)-len(start_block)+1)
+                    break
+
+                search_from = block_start+len(start_block)
+
+            block_end = buffer.find(end_block,search_from)
+
+            if block_end<0:
+                search_from = max(block_start+len(start_block),len(buffer)-len(end_block)+1)
+                break
+
+            statement = buffer[block_start+len(start_block):block_end].decode(encoding)
+
+            yield (buffer_offset+block_start,statement.replace(" ",""))
+
+            search_from = block_end+len(end_block)
+
+            block_start = -1
+
+        # drop the byte which has already been scanned
+
+        consumed = block_start if block_start>=0 else search_from
+
+        del buffer[:consumed]
+
+        buffer_offset+=consumed
+
+        search_from-=consumed
+
+        if block_start>=0:
+            block_start = 0
+
+        if len(chunk)==0:
+            return
+
+def iter_vih(source:Union[str,os.PathLike,BinaryIO],\
+             chunk_size:int=DEFAULT_CHUNK_SIZE,\
+             encoding:str="utf-8")->Iterator[Tuple[int,Optional[List[VIH]]]]:
+    """
+    Return (byte offset of the start block,vih of the block)
+    """
+
+    for (offset,vih_statement) in iter_vih_statements(source=source,\
+                                                      chunk_size=chunk_size,\
+                                                      encoding=encoding):
+        yield (offset,get_vih(vih_statement=vih_statement))
+
+@dataclass(frozen=True,slots=True)
+class VIHError:
+    """
+    position : index of the character in the vih statement where the error is found
+    """
+    position:int
+    message:str
+
 def get_vih(vih_statement:str)->Optional[List[VIH]]:
     """
     vih_statement: vih statement must always contains source
+    Return None when the vih statement is invalid (see scan_vih)
     """
 
-    vih:List[VIH] = list()
+    (vih,_) = scan_vih(vih_statement=vih_statement)
 
-    statements =  vih_statement.split(STATEMENT_DELIMINATOR)
-        
-    order = 1 
-
-    for statement in statements:
-        if len(statement.replace(" ",""))>1:
-            try:
-                source = parse_source(statement=statement)
-                target = parse_target(statement=statement)
-
-                vih.append(
-                    VIH
-                    (
-                        order=order,\
-                        source=remove_empty(source),\
-                        target=remove_empty(target)
-                    )
-                )
-
-                order+=1
-
-            except:
-                return None
-            
     return vih
 
+def scan_vih(vih_statement:str)->Tuple[Optional[List[VIH]],Optional[VIHError]]:
+    """
+    Scan the vih statement from left to right once
+    Return (vih,None) or (None,error) of the first invalid statement
+
+    statement : source:value,...|target:value,...|
+    The statements are separated by ; and the statement which has at most one
+    character other than the whitespace is skipped
+    """
+
+    vih:List[VIH] = list()
+
+    order = 1
+
+    position = 0
+
+    length = len(vih_statement)
+
+    while position<=length:
+
+        end = vih_statement.find(STATEMENT_DELIMINATOR,position)
+
+        if end<0:
+            end = length
+
+        # the statement without the whitespace is scanned with str.find only
+
+        if vih_statement.startswith(SOURCE_PREFIX,position,end):
+
+            source_start = position+len(SOURCE_PREFIX)
+
+            source_end = vih_statement.find(BLOCK_DELIMINATOR,source_start,end)
+
+            target_start = source_end+1+len(TARGET_PREFIX)
+
+            if source_end>=0 and vih_statement.startswith(TARGET_PREFIX,source_end+1,end):
+
+                target_end = vih_statement.find(BLOCK_DELIMINATOR,target_start,end)
+
+                if target_end>=0 and (target_end+1==end or vih_statement[target_end+1:end].isspace()):
+
+                    vih.append(VIH(order=order,\
+                                   source=_split_values(values=vih_statement[source_start:source_end]),\
+                                   target=_split_values(values=vih_statement[target_start:target_end])))
+
+                    order+=1
+
+                    position = end+1
+
+                    continue
+
+        (blocks,error) = _scan_statement(text=vih_statement,position=position,end=end)
+
+        if error is not None:
+            return (None,error)
+
+        if blocks is not None:
+
+            vih.append(VIH(order=order,source=blocks[0],target=blocks[1]))
+
+            order+=1
+
+        position = end+1
+
+    return (vih,None)
+
+def _split_values(values:str)->Tuple[str,...]:
+    """
+    Remove the space and the whitespace around the values
+    """
+
+    values = values.replace(" ","")
+
+    if values.isprintable():
+        return tuple(filter(None,values.split(VALUE_DELIMINATOR)))
+
+    return tuple(remove_empty([x.strip() for x in values.split(VALUE_DELIMINATOR)]))
+
+def _scan_statement(text:str,position:int,end:int)->Tuple[Optional[Tuple[Tuple[str,...],Tuple[str,...]]],Optional[VIHError]]:
+    """
+    Scan the statement between the position and the end one character at a time
+    Return ((source,target),None) , (None,None) when the statement is skipped or (None,error)
+    """
+
+    if len("".join(text[position:end].split()))<=1:
+        return (None,None)
+
+    (source,position,error) = _scan_block(text=text,position=position,end=end,block=SOURCE_BLOCK)
+
+    if error is not None:
+        return (None,error)
+
+    (target,position,error) = _scan_block(text=text,position=position,end=end,block=TARGET_BLOCK)
+
+    if error is not None:
+        return (None,error)
+
+    position = _skip_space(text=text,position=position,end=end)
+
+    if position<end:
+        return (None,VIHError(position=position,message="expected "+STATEMENT_DELIMINATOR))
+
+    return ((source,target),None)
+
+def _scan_block(text:str,position:int,end:int,block:str)->Tuple[Tuple[str,...],int,Optional[VIHError]]:
+    """
+    Scan block:value,...| from the position
+    Return (values,position after the block,error)
+    """
+
+    position = _skip_space(text=text,position=position,end=end)
+
+    if not text.startswith(block,position,end):
+        return ((),position,VIHError(position=position,message="expected "+block))
+
+    position = _skip_space(text=text,position=position+len(block),end=end)
+
+    if position>=end or text[position]!=":":
+        return ((),position,VIHError(position=position,message="expected :"))
+
+    block_end = text.find(BLOCK_DELIMINATOR,position+1,end)
+
+    if block_end<0:
+        return ((),end,VIHError(position=end,message="expected "+BLOCK_DELIMINATOR))
+
+    return (_split_values(values=text[position+1:block_end]),block_end+1,None)
+
+def _skip_space(text:str,position:int,end:int)->int:
+
+    while position<end and text[position].isspace():
+        position+=1
+
+    return position
+
 def parse_source(statement:str)->List[str]:
 
 
@@ -99,17 +322,26 @@ def vih_to_edge(vih:VIH)->List[Edge]:
             Edge
             (
                 node_name=target,
-                parent_nodes=vih.source
+                parent_nodes=list(vih.source)
             )
         )
     
     return edges
 
 def vihs_to_edges(vihs:List[VIH])->List[Edge]:
-    
-    graphs:List[List[Edge]] = list()
+    """
+    Build the edges of all the vih in a single pass (see merge_node_parents)
+    The node keep the order in which it first appear (source before target of each vih)
+    """
+
+    return merge_node_parents(node_parents=_iter_node_parents(vihs=vihs))
+
+def _iter_node_parents(vihs:List[VIH])->Iterator[Tuple[str,Tuple[str,...]]]:
 
     for vih in vihs:
-        graphs.append(vih_to_edge(vih=vih))
 
-    return merge_edges(graphs=graphs)
\ No newline at end of file
+        for source in vih.source:
+            yield (source,())
+
+        for target in vih.target:
+            yield (target,vih.source)